@@ -1,343 +1,263 @@
-import streamlit as st
-import tempfile
-import os
-from chalicelib import (
-    s3_utils,
-    textract_utils,
-    comprehend_utils,
-    polly_utils,
-    translate_utils,
-    text_processing,
-    pdf_utils
-)
-from datetime import datetime, timedelta
-from urllib.parse import parse_qs
-from dotenv import load_dotenv
-import sys
-import traceback
-from chalicelib.subscription import (
-    fetch_subscription_tier,
-    display_pricing,
-    check_upload_limit,
-    increment_upload_count,
-    has_feature
-)
-import logging
-
-
-# Force full-width layout and improve visuals
-st.markdown("""
-    <style>
-        /* Make app use full width */
-        .main .block-container {
-            padding-top: 2rem;
-            padding-bottom: 2rem;
-            padding-left: 3rem;
-            padding-right: 3rem;
-            max-width: 100%;
-        }
-
-        /* Improve button appearance */
-        .stButton > button {
-            background-color: #4CAF50;
-            color: white;
-            font-size: 16px;
-            padding: 0.5em 1em;
-            border-radius: 8px;
-        }
-        .stButton > button:hover {
-            background-color: #45a049;
-        }
-
-        /* Card-like section for description */
-        .app-intro {
-            background-color: #f9f9f9;
-            border-radius: 12px;
-            padding: 1.5rem;
-            margin-bottom: 2rem;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.05);
-        }
-    </style>
-""", unsafe_allow_html=True)
-
-
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
-# Load environment variables
-load_dotenv()
-
-# Set up development mode
-DEV_MODE = os.getenv('COGNITO_DEVELOPMENT_MODE', '').lower() in ('true', '1', 't')
-
-# Try to import and initialize Cognito auth
-try:
-    from chalicelib.cognito_auth import CognitoAuth
-    auth = CognitoAuth()
-    auth_enabled = True
-except Exception as e:
-    if DEV_MODE:
-        st.warning("⚠️ Running in development mode without authentication")
-        auth_enabled = False
-    else:
-        st.error(f"❌ Authentication error: {str(e)}")
-        st.error(traceback.format_exc())
-        auth_enabled = False
-
-def initialize_session_state():
-    """Initialize session state variables"""
-    defaults = {
-        "authenticated": not auth_enabled or DEV_MODE,
-        "user_info": {"name": "Developer", "email": "dev@example.com"} if DEV_MODE else None,
-        "access_token": "dev-token" if DEV_MODE else None,
-        "subscription_tier": "free" if DEV_MODE else None,
-        "upload_count": 0,
-        "last_reset": datetime.now().isoformat(),
-        "manage_subscription": False
-    }
-    
-    for key, value in defaults.items():
-        if key not in st.session_state:
-            st.session_state[key] = value
-    # Add this to your initialization sequence to verify credentials
-    print("AWS_ACCESS_KEY_ID exists:", os.getenv("AWS_ACCESS_KEY_ID") is not None)
-    print("AWS_SECRET_ACCESS_KEY exists:", os.getenv("AWS_SECRET_ACCESS_KEY") is not None)
-    print("AWS_REGION:", os.getenv("AWS_REGION"))
-    print("S3_BUCKET_NAME:", os.getenv("S3_BUCKET_NAME"))
-
-def handle_auth_callback():
-    """Handle the OAuth callback after user login"""
-    if not auth_enabled or DEV_MODE:
-        return
-    
-    query_params = st.query_params
-    if "code" in query_params:
-        try:
-            code = query_params["code"]
-            
-            # Prevent replay attacks
-            if "last_processed_code" in st.session_state and st.session_state.last_processed_code == code:
-                st.query_params.clear()
-                return
-            
-            # Validate state
-            if "state" in query_params and "oauth_state" in st.session_state:
-                if query_params["state"] != st.session_state.oauth_state:
-                    raise ValueError("State parameter mismatch")
-            
-            # Get tokens and user info
-            tokens = auth.get_tokens(code)
-            user_info = auth.get_user_info(tokens["access_token"])
-            
-            # Set session state
-            st.session_state.update({
-                "access_token": tokens["access_token"],
-                "user_info": user_info,
-                "authenticated": True,
-                "last_processed_code": code,
-                "oauth_state": None,
-                "subscription_tier": fetch_subscription_tier(user_info["username"])
-            })
-            
-            st.query_params.clear()
-            st.rerun()
-        except Exception as e:
-            st.error(f"Authentication error: {str(e)}")
-            st.session_state.authenticated = False
-            st.query_params.clear()
-            st.rerun()
-
-def login_page():
-    """Display login page with intro and styling"""
-    st.title("✍ VisionVoice: Handwriting to Voice")
-
-    # Intro card
-    st.markdown(
-        """
-        <div class="app-intro">
-            <h3>Welcome to VisionVoice 👋</h3>
-            <p><strong>VisionVoice</strong> helps transform handwritten content into meaningful, accessible experiences for visually impaired and blind users.</p>
-            <ul>
-                <li>📝 Extract handwritten text from photos</li>
-                <li>🧠 Summarize long passages (Basic tier)</li>
-                <li>🌍 Translate into Spanish, French, and more (Pro tier)</li>
-                <li>🔊 Convert text to natural voice</li>
-                <li>📄 Download results as a PDF</li>
-            </ul>
-            <p>Sign in to get started and explore the features tailored to your needs!</p>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-
-    st.header("🔐 Login")
-
-    if auth_enabled:
-        st.subheader("Sign in to VisionVoice")
-        if st.button("Sign in with Cognito"):
-            try:
-                login_url = auth.get_login_url()
-                st.markdown(f'<meta http-equiv="refresh" content="0;url={login_url}">', unsafe_allow_html=True)
-            except Exception as e:
-                st.error(f"Failed to generate login URL: {str(e)}")
-    else:
-        st.error("Authentication configuration error")
-        if DEV_MODE and st.button("Continue in development mode"):
-            st.rerun()
-
-
-
-def logout():
-    """Handle logout process"""
-    st.session_state.authenticated = False
-    st.session_state.user_info = None
-    st.session_state.subscription_tier = None
-    
-    if auth_enabled and not DEV_MODE:
-        try:
-            logout_url = auth.logout_url()
-            st.markdown(f'<meta http-equiv="refresh" content="0;url={logout_url}">', unsafe_allow_html=True)
-        except Exception as e:
-            st.error(f"Logout error: {str(e)}")
-            st.rerun()
-    else:
-        st.rerun()
-
-def process_file(uploaded_file):
-    """Process uploaded file with tier restrictions"""
-    if not check_upload_limit():
-        return
-
-    with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        tmp_path = tmp_file.name
-        s3_filename = uploaded_file.name
-        
-        try:
-            # Upload to S3
-            s3_utils.upload_to_s3(tmp_path, s3_filename)
-            
-            # Extract text
-            st.info("🧠 Extracting handwritten text...")
-            extracted_text = textract_utils.extract_text_from_image(s3_filename)
-            
-            # Show raw text
-            st.subheader("📝 Raw Extracted Text:")
-            st.write(extracted_text)
-
-            # Clean and format sentences
-            st.info("🧹 Formatting text for natural speech...")
-            formatted_text = text_processing.clean_and_format_sentences(extracted_text)
-
-            # st.subheader("✅ Final Cleaned Text:")
-            # st.write(formatted_text)
-
-            # Handle features with tier checks
-            final_text = handle_summarization(formatted_text)
-            if final_text != formatted_text:  # Only proceed if text was summarized
-                st.write(final_text)
-            final_text = handle_translation(final_text)
-            handle_speech_conversion(final_text)
-            handle_pdf_download(final_text)
-
-            
-            increment_upload_count()
-            
-        finally:
-            os.unlink(tmp_path)
-
-def handle_summarization(text):
-    """Handle summarization with tier check"""
-    if len(text) > 500:
-        if has_feature("Summarization"):
-            choice = st.radio("Summarize long text?", ["No", "Yes"])
-            if choice == "Yes":
-                return comprehend_utils.summarize_text(text)
-        else:
-            st.warning("🔒 Summarization requires Basic tier or higher")
-    return text
-
-def handle_translation(text):
-    """Handle translation with tier check"""
-    if has_feature("Translation"):
-        target_lang = st.selectbox("Translate to:", ["None", "Spanish", "French", "German", "Chinese"])
-        lang_map = {"Spanish": "es", "French": "fr", "German": "de", "Chinese": "zh"}
-        
-        if target_lang != "None":
-            translated = translate_utils.translate_text(text, lang_map[target_lang])
-            st.subheader("🌐 Translated Text:")
-            st.write(translated)
-            return translated
-    else:
-        st.warning("🔒 Translation requires Pro tier")
-    return text
-
-def handle_speech_conversion(text):
-    """Handle speech conversion with tier check"""
-    if has_feature("Speech Conversion"):
-        if st.button("🔊 Convert to Speech"):
-            audio_url = polly_utils.text_to_speech(text)
-            st.audio(audio_url, format="audio/mp3")
-    else:
-        st.warning("🔒 Speech conversion requires Pro tier")
-
-def handle_pdf_download(text):
-    """Handle PDF download with tier check"""
-    if has_feature("PDF Download"):
-        if st.button("📄 Download PDF"):
-            pdf_path = pdf_utils.generate_pdf(text)
-            with open(pdf_path, "rb") as f:
-                st.download_button("Download PDF", f, "extracted_text.pdf")
-            os.remove(pdf_path)
-    else:
-        st.warning("🔒 PDF download requires Basic tier")
-
-def main_app():
-    """Main application interface"""
-    st.title("✍ VisionVoice: Handwriting to Voice")
-    
-    # Sidebar
-    st.sidebar.subheader("Account")
-    if st.session_state.user_info:
-        st.sidebar.write(f"👤 {st.session_state.user_info.get('name', 'User')}")
-        st.sidebar.write(f"📧 {st.session_state.user_info.get('email', 'N/A')}")
-        st.sidebar.write(f"💎 Tier: {st.session_state.subscription_tier.capitalize()}")
-        st.sidebar.write(f"📤 Uploads used: {st.session_state.upload_count}")
-    
-    if st.sidebar.button("🚪 Logout"):
-        logout()
-    
-    if st.sidebar.button("💰 Manage Subscription"):
-        st.session_state.manage_subscription = True
-    
-    # Subscription management view
-    if st.session_state.get("manage_subscription"):
-        display_pricing()
-        if st.button("← Back to App"):
-            st.session_state.manage_subscription = False
-            st.rerun()
-        return
-    
-    # Main functionality
-    uploaded_file = st.file_uploader("Upload handwritten image", type=["jpg", "jpeg", "png"])
-    if uploaded_file:
-        process_file(uploaded_file)
-
-def main():
-    """Main application flow"""
-    initialize_session_state()
-    handle_auth_callback()
-    
-    if st.session_state.authenticated:
-        if st.session_state.subscription_tier is None:
-            display_pricing()
-        else:
-            main_app()
-    else:
-        login_page()
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import os
+import logging
+
+from chalice import (
+    BadRequestError,
+    Chalice,
+    CognitoUserPoolAuthorizer,
+    ConflictError,
+    ForbiddenError,
+    NotFoundError,
+    Response,
+    UnauthorizedError
+)
+
+from chalicelib import jobs
+from chalicelib.textract_utils import DEFAULT_PROFILE, EXTRACTION_PROFILES
+
+app = Chalice(app_name='Vision_Voice')
+app.log.setLevel(logging.INFO)
+app.api.binary_types.extend(['application/pdf', 'image/tiff'])
+
+UPLOAD_CONTENT_TYPES = ['image/jpeg', 'image/png', 'image/tiff', 'application/pdf', 'application/octet-stream']
+UPLOAD_EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/tiff': '.tiff', 'application/pdf': '.pdf'}
+# API Gateway rejects request bodies over 10 MB
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# In Lambda, jobs live in S3 and run in a separate worker function; `chalice local` uses a
+# local directory and worker threads
+IN_LAMBDA = 'AWS_LAMBDA_FUNCTION_NAME' in os.environ
+JOB_RUNNER = os.getenv('JOB_RUNNER', 'lambda' if IN_LAMBDA else 'thread')
+if IN_LAMBDA:
+    os.environ.setdefault('JOB_STORE', 's3')
+JOB_FUNCTION_NAME = os.getenv('JOB_FUNCTION_NAME', f"{os.getenv('AWS_LAMBDA_FUNCTION_NAME')}-process_job")
+
+store = jobs.create_job_store()
+
+# Require Cognito ID tokens when a user pool is configured. Without one every route
+# refuses requests, unless API_AUTH_DISABLED is set for local development
+authorizer = None
+if os.getenv('COGNITO_USER_POOL_ARN'):
+    authorizer = CognitoUserPoolAuthorizer('VisionVoiceUsers', provider_arns=[os.getenv('COGNITO_USER_POOL_ARN')])
+AUTH_DISABLED = os.getenv('API_AUTH_DISABLED', '').lower() in ('true', '1', 't')
+DEV_TIER = os.getenv('API_DEV_TIER', 'free')
+
+
+def _caller(*features):
+    """Return (username, tier) for the request, requiring every listed tier feature."""
+    from chalicelib.subscription import fetch_subscription_tier, tier_has_feature
+
+    if authorizer is not None:
+        claims = (app.current_request.context.get('authorizer') or {}).get('claims') or {}
+        username = claims.get('cognito:username') or claims.get('username')
+        if not username:
+            raise UnauthorizedError("Missing identity claims")
+        tier = fetch_subscription_tier(username, claims=claims)
+        if not tier:
+            raise ForbiddenError("Choose a subscription plan to use the API")
+    elif AUTH_DISABLED:
+        username, tier = "developer", DEV_TIER
+    else:
+        raise UnauthorizedError("API authentication is not configured")
+
+    for feature in features:
+        if not tier_has_feature(tier, feature):
+            raise ForbiddenError(f"{feature} is not included in the {tier} tier")
+    return username, tier
+
+
+def _job_record(job_id, username):
+    """Return the caller's job record; other users' jobs are reported as missing."""
+    try:
+        record = store.get_record(job_id)
+    except jobs.JobNotFound:
+        raise NotFoundError(f"Unknown job: {job_id}")
+    if record.get("owner") != username:
+        raise NotFoundError(f"Unknown job: {job_id}")
+    return record
+
+
+def _finished_job(job_id, username):
+    """Return the job record, or raise the HTTP error for a missing or unfinished job."""
+    record = _job_record(job_id, username)
+    if record["status"] == "failed":
+        raise ConflictError(f"Job failed: {record.get('error')}")
+    if record["status"] != "done":
+        raise ConflictError(f"Job is still {record['status']}")
+    return record
+
+
+def _text(job_id):
+    return store.get_artifact(job_id, "text.txt").decode("utf-8")
+
+
+def _summary(job_id, backend=None):
+    from chalicelib.pipeline import summarize_stage
+    name = f"summary-{backend}.txt" if backend else "summary.txt"
+    return jobs.text_artifact(
+        store, job_id, name, lambda: summarize_stage(_text(job_id), enabled=True, backend=backend)
+    )
+
+
+def _translation(job_id, language, source):
+    from chalicelib.translate_utils import translate_text
+    base = _summary if source == "summary" else _text
+    return jobs.text_artifact(
+        store, job_id, f"translation-{source}-{language}.txt", lambda: translate_text(base(job_id), language)
+    )
+
+
+def _requested_text(job_id, tier):
+    """Resolve the text, summary or translation selected by ?source=&lang= query params."""
+    from chalicelib.subscription import tier_has_feature
+    from chalicelib.translate_utils import SUPPORTED_LANGUAGES
+
+    params = app.current_request.query_params or {}
+    source = params.get("source", "text")
+    if source not in ("text", "summary"):
+        raise BadRequestError("source must be 'text' or 'summary'")
+    language = params.get("lang")
+    if language and language not in SUPPORTED_LANGUAGES:
+        raise BadRequestError(f"lang must be an Amazon Translate language code, e.g. es; got {language!r}")
+    for feature, wanted in (("Summarization", source == "summary"), ("Translation", language)):
+        if wanted and not tier_has_feature(tier, feature):
+            raise ForbiddenError(f"{feature} is not included in the {tier} tier")
+    if language:
+        return _translation(job_id, language, source), f"{source}-{language}"
+    return (_summary(job_id) if source == "summary" else _text(job_id)), source
+
+
+@app.route('/jobs', methods=['POST'], content_types=UPLOAD_CONTENT_TYPES, authorizer=authorizer)
+def submit_image():
+    """Submit an image or scanned document (raw request body) for text extraction.
+
+    The upload counts against the caller's monthly quota before any AWS work starts.
+    """
+    from chalicelib.subscription import get_quota_tracker, upload_limit
+
+    username, tier = _caller("Text Extraction")
+    request = app.current_request
+    params = request.query_params or {}
+    body = request.raw_body
+    if not body:
+        raise BadRequestError("Request body must contain the document bytes")
+    if len(body) > MAX_UPLOAD_BYTES:
+        raise BadRequestError("Documents must be 10 MB or smaller")
+    profile = params.get("profile", DEFAULT_PROFILE)
+    if profile not in EXTRACTION_PROFILES:
+        raise BadRequestError(f"profile must be one of: {', '.join(EXTRACTION_PROFILES)}")
+    content_type = request.headers.get('content-type', '').split(';')[0]
+    filename = os.path.basename(params.get("filename", f"upload{UPLOAD_EXTENSIONS.get(content_type, '.jpg')}"))
+
+    allowed, used = get_quota_tracker().try_consume(username, upload_limit(tier))
+    if not allowed:
+        raise ForbiddenError(f"Monthly upload limit reached for the {tier} tier ({used} used)")
+    record = jobs.submit_job(store, body, filename, profile, owner=username)
+    if JOB_RUNNER == 'lambda':
+        jobs.invoke_async(record["job_id"], JOB_FUNCTION_NAME)
+    else:
+        jobs.run_in_thread(store, record["job_id"])
+    return Response(body=record, status_code=202, headers={'Location': f"/jobs/{record['job_id']}"})
+
+
+@app.route('/jobs/{job_id}', methods=['GET'], authorizer=authorizer)
+def job_status(job_id):
+    """Return the job record: status, filename, profile, stage timings or error."""
+    username, _ = _caller("Text Extraction")
+    return _job_record(job_id, username)
+
+
+@app.route('/jobs/{job_id}/trace', methods=['GET'], authorizer=authorizer)
+def get_trace(job_id):
+    """Return the job's AWS calls per operation and, with ?format=jsonl, the raw call records."""
+    import json
+    from chalicelib.aws_tracing import summarize_calls
+
+    username, _ = _caller("Text Extraction")
+    _job_record(job_id, username)
+    data = store.get_artifact(job_id, "trace.jsonl")
+    if data is None:
+        raise ConflictError("Job is still running")
+    if (app.current_request.query_params or {}).get("format") == "jsonl":
+        return Response(body=data.decode("utf-8"), status_code=200, headers={'Content-Type': 'application/x-ndjson'})
+    calls = [json.loads(line) for line in data.decode("utf-8").splitlines() if line]
+    return {"job_id": job_id, "operations": summarize_calls(calls)}
+
+
+@app.route('/jobs/{job_id}/text', methods=['GET'], authorizer=authorizer)
+def get_text(job_id):
+    """Return the raw and cleaned extracted text."""
+    username, _ = _caller("Text Extraction")
+    _finished_job(job_id, username)
+    return {"job_id": job_id, "raw_text": store.get_artifact(job_id, "raw.txt").decode("utf-8"), "text": _text(job_id)}
+
+
+@app.route('/jobs/{job_id}/summary', methods=['GET'], authorizer=authorizer)
+def get_summary(job_id):
+    """Return the summary of the extracted text (?backend=comprehend|local|auto to choose the scorer)."""
+    from chalicelib.comprehend_utils import LOCAL_SUMMARY_AVAILABLE, SUMMARY_BACKENDS
+
+    username, _ = _caller("Summarization")
+    _finished_job(job_id, username)
+    backend = (app.current_request.query_params or {}).get("backend")
+    if backend and backend not in SUMMARY_BACKENDS:
+        raise BadRequestError(f"backend must be one of: {', '.join(SUMMARY_BACKENDS)}")
+    if backend == "local" and not LOCAL_SUMMARY_AVAILABLE:
+        raise BadRequestError("The local summary backend is not available in this deployment")
+    return {"job_id": job_id, "summary": _summary(job_id, backend)}
+
+
+@app.route('/jobs/{job_id}/translation', methods=['GET'], authorizer=authorizer)
+def get_translation(job_id):
+    """Return the text (or ?source=summary) translated to ?lang=."""
+    username, tier = _caller("Translation")
+    _finished_job(job_id, username)
+    params = app.current_request.query_params or {}
+    if not params.get("lang"):
+        raise BadRequestError("lang query parameter is required, e.g. ?lang=es")
+    text, _ = _requested_text(job_id, tier)
+    return {"job_id": job_id, "language": params["lang"], "translation": text}
+
+
+@app.route('/jobs/{job_id}/audio', methods=['GET'], authorizer=authorizer)
+def get_audio(job_id):
+    """Synthesize the selected text with Polly and return a URL for the MP3 (or the MP3 itself)."""
+    from chalicelib import polly_utils
+
+    username, tier = _caller("Speech Conversion")
+    _finished_job(job_id, username)
+    voice = (app.current_request.query_params or {}).get("voice", "Joanna")
+    if voice not in polly_utils.VOICES:
+        raise BadRequestError(f"voice must be one of: {', '.join(sorted(polly_utils.VOICES))}")
+    text, _ = _requested_text(job_id, tier)
+    audio = polly_utils.text_to_speech(text, voice_id=voice)
+    if isinstance(audio, bytes):
+        # AUDIO_CACHE_STORAGE=none: nothing archived, so return the MP3 itself
+        return Response(body=audio, status_code=200, headers={'Content-Type': 'audio/mpeg'})
+    return {"job_id": job_id, "audio_url": audio}
+
+
+@app.route('/jobs/{job_id}/pdf', methods=['GET'], authorizer=authorizer)
+def get_pdf(job_id):
+    """Return the selected text as a PDF (send Accept: application/pdf through API Gateway)."""
+    from chalicelib.pipeline import pdf_stage
+
+    username, tier = _caller("PDF Download")
+    record = _finished_job(job_id, username)
+    text, variant = _requested_text(job_id, tier)
+    name = f"{variant}.pdf"
+    pdf_bytes = store.get_artifact(job_id, name)
+    if pdf_bytes is None:
+        pdf_bytes = pdf_stage(text)
+        store.put_artifact(job_id, name, pdf_bytes)
+    filename = f"{os.path.splitext(record['filename'])[0]}.pdf"
+    return Response(body=pdf_bytes, status_code=200, headers={
+        'Content-Type': 'application/pdf',
+        'Content-Disposition': f'attachment; filename="{filename}"'
+    })
+
+
+@app.lambda_function(name='process_job')
+def process_job_handler(event, context):
+    """Worker invoked asynchronously by submit_image in Lambda."""
+    jobs.process_job(store, event["job_id"])
@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+# Load environment variables before chalicelib reads its configuration
+load_dotenv()
+
+from chalicelib import aws_tracing, metrics
+from chalicelib.comprehend_utils import SUMMARY_BACKENDS
+from chalicelib.orchestrator import PipelineJob
+from chalicelib.pipeline import SourceDocument, StageMemo, build_document_pipeline, limit_service_concurrency
+from chalicelib.polly_utils import audio_location_url
+from chalicelib.textract_utils import DEFAULT_PROFILE, EXTRACTION_PROFILES
+
+logger = logging.getLogger("visionvoice.batch")
+
+BATCH_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.pdf', '.tif', '.tiff')
+
+# Default in-flight calls per AWS service, below the default per-account TPS quotas
+DEFAULT_SERVICE_LIMITS = {"s3": 16, "textract": 4, "comprehend": 8, "translate": 8, "polly": 6}
+
+
+def batch_files(directory):
+    """Return the documents in a directory (recursively), relative to it, in sorted order."""
+    found = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.lower().endswith(BATCH_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(root, name), directory))
+    return sorted(found)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Checkpoint:
+    """JSON record of finished files so an interrupted batch resumes where it stopped."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.files = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.files = json.load(f).get("files", {})
+
+    def is_done(self, relpath, digest):
+        entry = self.files.get(relpath)
+        return bool(entry) and entry["status"] == "done" and entry["digest"] == digest
+
+    def record(self, relpath, entry):
+        """Store a file's outcome and rewrite the checkpoint atomically."""
+        with self._lock:
+            self.files[relpath] = entry
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"files": self.files}, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def process_one(graph, directory, relpath, targets, output_dir, checkpoint, executor):
+    """Run one document through the pipeline and write its outputs; never raises."""
+    try:
+        with open(os.path.join(directory, relpath), "rb") as f:
+            # The relative path keeps student1/hw1.jpg and student2/hw1.jpg apart in outputs and logs
+            source = SourceDocument(f.read(), relpath)
+    except OSError as e:
+        logger.error(f"Batch file unreadable - File: {relpath}, Error: {e}")
+        entry = {"digest": None, "outputs": {}, "status": "failed", "error": str(e), "timings": [], "seconds": 0.0}
+        checkpoint.record(relpath, entry)
+        return relpath, entry
+    if checkpoint.is_done(relpath, source.digest):
+        return relpath, None
+
+    # AWS calls made by this document's stages are traced under its relative path
+    with aws_tracing.trace(relpath):
+        job = PipelineJob(graph, source, targets, executor).start()
+    entry = {"digest": source.digest, "outputs": {}}
+    try:
+        text = job.result("translate")
+        stem = os.path.join(output_dir, os.path.splitext(relpath)[0])
+        os.makedirs(os.path.dirname(stem), exist_ok=True)
+        with open(stem + ".txt", "w", encoding="utf-8") as f:
+            f.write(text)
+        entry["outputs"]["text"] = stem + ".txt"
+        if "pdf" in targets:
+            with open(stem + ".pdf", "wb") as f:
+                f.write(job.result("pdf"))
+            entry["outputs"]["pdf"] = stem + ".pdf"
+        if "synthesize" in targets:
+            audio = audio_location_url(job.result("synthesize"))
+            if isinstance(audio, bytes):
+                # AUDIO_CACHE_STORAGE=none: nothing archived, so keep the MP3 next to the text
+                with open(stem + ".mp3", "wb") as f:
+                    f.write(audio)
+                audio = stem + ".mp3"
+            entry["outputs"]["audio"] = audio
+        entry["status"] = "done"
+    except Exception as e:
+        logger.error(f"Batch file failed - File: {relpath}, Error: {e}")
+        job.cancel()
+        entry["status"] = "failed"
+        entry["error"] = str(e)
+    job.wait()
+    entry["timings"] = job.timings()
+    entry["seconds"] = job.wall_seconds()
+    entry["aws_calls"] = aws_tracing.summary(relpath)
+    checkpoint.record(relpath, entry)
+    return relpath, entry
+
+
+def summarize_run(entries, elapsed):
+    """Build the throughput summary: files/min and p50/p95 seconds per stage."""
+    done = [entry for entry in entries if entry["status"] == "done"]
+    stage_seconds = {}
+    for entry in entries:
+        for timing in entry["timings"]:
+            if timing["status"] in ("computed", "joined"):
+                stage_seconds.setdefault(timing["stage"], []).append(timing["seconds"])
+    return {
+        "files": len(entries),
+        "succeeded": len(done),
+        "failed": len(entries) - len(done),
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_minute": round(len(done) / elapsed * 60, 2) if elapsed else 0.0,
+        "stages": {
+            stage: {
+                "count": len(seconds),
+                "p50": round(percentile(seconds, 50), 3),
+                "p95": round(percentile(seconds, 95), 3),
+            }
+            for stage, seconds in stage_seconds.items()
+        },
+    }
+
+
+def parse_limits(values):
+    limits = dict(DEFAULT_SERVICE_LIMITS)
+    for value in values or []:
+        service, _, limit = value.partition("=")
+        if service not in limits or not limit.isdigit() or int(limit) < 1:
+            raise argparse.ArgumentTypeError(f"Invalid service limit: {value}")
+        limits[service] = int(limit)
+    return limits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a directory of scans through the VisionVoice pipeline")
+    parser.add_argument("directory", help="Directory of images, PDFs or TIFFs")
+    parser.add_argument("--output", default="batch_output", help="Directory for text, PDF and summary files")
+    parser.add_argument("--workers", type=int, default=4, help="Documents processed at once")
+    parser.add_argument("--profile", choices=sorted(EXTRACTION_PROFILES), default=DEFAULT_PROFILE)
+    parser.add_argument("--summarize", action="store_true", help="Summarize extracted text")
+    parser.add_argument("--summarizer", choices=SUMMARY_BACKENDS,
+                        help="Summary backend (default: SUMMARY_BACKEND, or auto by text length)")
+    parser.add_argument("--translate", metavar="LANG", help="Translate to a language code, e.g. es")
+    parser.add_argument("--pdf", action="store_true", help="Write a PDF per document")
+    parser.add_argument("--audio", action="store_true", help="Synthesize speech per document")
+    parser.add_argument("--limit", action="append", metavar="SERVICE=N",
+                        help=f"Concurrent calls per AWS service (defaults: {DEFAULT_SERVICE_LIMITS})")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>/checkpoint.json)")
+    parser.add_argument("--metrics-port", type=int, default=metrics.METRICS_PORT or None,
+                        help="Serve Prometheus metrics on this local port while the batch runs")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    os.makedirs(args.output, exist_ok=True)
+    checkpoint = Checkpoint(args.checkpoint or os.path.join(args.output, "checkpoint.json"))
+    if args.metrics_port:
+        metrics.start_metrics_server(args.metrics_port)
+
+    graph = limit_service_concurrency(build_document_pipeline(StageMemo(max_entries=args.workers * 16)),
+                                      parse_limits(args.limit))
+    graph.set_params("extract", profile=args.profile)
+    graph.set_params("summarize", enabled=args.summarize, backend=args.summarizer)
+    graph.set_params("translate", target_language=args.translate)
+    targets = ["translate"] + (["pdf"] if args.pdf else []) + (["synthesize"] if args.audio else [])
+
+    files = batch_files(args.directory)
+    print(f"Processing {len(files)} files with {args.workers} workers")
+    entries = []
+    start = time.perf_counter()
+    # Documents run on one pool; their stages run on another so PDF and audio overlap
+    with ThreadPoolExecutor(max_workers=args.workers * 2, thread_name_prefix="batch-stage") as stage_pool, \
+            ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="batch-file") as file_pool:
+        futures = [
+            file_pool.submit(process_one, graph, args.directory, relpath, targets, args.output, checkpoint, stage_pool)
+            for relpath in files
+        ]
+        for future in as_completed(futures):
+            relpath, entry = future.result()
+            if entry is None:
+                print(f"  skipped {relpath} (already done)")
+                continue
+            entries.append(entry)
+            print(f"  {entry['status']:<6} {relpath} ({entry['seconds']:.1f} s)")
+
+    summary = summarize_run(entries, time.perf_counter() - start)
+    with open(os.path.join(args.output, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    aws_tracing.export_jsonl(os.path.join(args.output, "aws_calls.jsonl"))
+
+    print(f"\n{summary['succeeded']}/{summary['files']} succeeded, "
+          f"{summary['files_per_minute']} files/min")
+    for stage, stats in summary["stages"].items():
+        print(f"  {stage:<11} n={stats['count']:<4} p50 {stats['p50']:.2f} s  p95 {stats['p95']:.2f} s")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_summarize import synthetic_text
+from chalicelib import pdf_utils
+
+# Roughly one letter page of wrapped 12 pt Helvetica
+CHARS_PER_PAGE = 4500
+
+
+def paragraphs(char_count):
+    """Synthetic text broken into short paragraphs, as OCR output usually is."""
+    words = synthetic_text(char_count).split(" ")
+    return "\n".join(" ".join(words[i:i + 60]) for i in range(0, len(words), 60))
+
+
+if __name__ == "__main__":
+    print("=== PDF rendering benchmark ===")
+    # Keep reportlab's import and font loading out of the first measurement
+    pdf_utils.generate_pdf("warm up")
+    for target_pages in (1, 10, 50, 100, 200):
+        text = paragraphs(target_pages * CHARS_PER_PAGE)
+        start = time.perf_counter()
+        pdf = pdf_utils.generate_pdf(text)
+        seconds = time.perf_counter() - start
+        pages = pdf.count(b"/Type /Page\n") or pdf.count(b"/Type /Page ")
+        print(f"{len(text):>9,} chars: {seconds * 1000:8.1f} ms, {len(pdf) / 1024:7.1f} KiB, "
+              f"{seconds * 1000 / max(pages, 1):5.2f} ms/page ({pages} pages)")
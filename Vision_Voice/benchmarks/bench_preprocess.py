@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chalicelib import image_preprocessing
+
+TEXTRACT_BYTES_LIMIT = 5 * 1024 * 1024
+
+
+def time_textract(data):
+    """Time a DetectDocumentText call on raw bytes; None if over the sync limit."""
+    from chalicelib.aws_clients import get_client
+
+    if len(data) > TEXTRACT_BYTES_LIMIT:
+        return None
+    start = time.perf_counter()
+    get_client('textract').detect_document_text(Document={'Bytes': data})
+    return time.perf_counter() - start
+
+
+def image_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if image_preprocessing.should_preprocess(name):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report bytes saved and latency impact of OCR preprocessing")
+    parser.add_argument("paths", nargs="+", help="Image files or directories")
+    parser.add_argument("--textract", action="store_true", help="Also time Textract on raw vs processed bytes")
+    args = parser.parse_args()
+
+    print("=== Image preprocessing benchmark ===")
+    total_before = total_after = 0
+    for path in image_paths(args.paths):
+        with open(path, "rb") as f:
+            data = f.read()
+        processed, stats = image_preprocessing.preprocess_image(data)
+        total_before += stats["original_bytes"]
+        total_after += stats["processed_bytes"]
+        line = (
+            f"{os.path.basename(path)}: {stats['original_bytes'] / 1e6:.2f} MB → "
+            f"{stats['processed_bytes'] / 1e6:.2f} MB, preprocess {stats['seconds'] * 1000:.0f} ms"
+        )
+        if args.textract:
+            raw_seconds = time_textract(data)
+            processed_seconds = time_textract(processed)
+            raw = "over limit" if raw_seconds is None else f"{raw_seconds * 1000:.0f} ms"
+            line += f", Textract raw {raw} vs processed {processed_seconds * 1000:.0f} ms"
+        print(line)
+
+    if total_before:
+        print(f"\nTotal: {total_before / 1e6:.2f} MB → {total_after / 1e6:.2f} MB "
+              f"({1 - total_after / total_before:.0%} saved)")
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chalicelib import comprehend_utils
+from chalicelib.phrase_matcher import PhraseMatcher
+from chalicelib.text_processing import split_text_by_bytes
+
+WORDS = (
+    "student teacher lesson homework reading writing science history planet energy water "
+    "garden library project notebook question answer chapter summary experiment result"
+).split()
+
+
+def synthetic_text(char_count, seed=11):
+    """Build note-like text of roughly char_count characters."""
+    rng = random.Random(seed)
+    sentences = []
+    size = 0
+    while size < char_count:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def synthetic_phrases(count, seed=5):
+    """Key phrases shaped like Comprehend output: one to three word noun phrases."""
+    rng = random.Random(seed)
+    return {" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) for _ in range(count)}
+
+
+def legacy_scores(sentences, key_phrases):
+    """The previous per-phrase substring test, for comparison."""
+    return [sum(1 for phrase in key_phrases if phrase in sentence.lower()) for sentence in sentences]
+
+
+def automaton_scores(sentences, key_phrases):
+    matcher = PhraseMatcher(key_phrases)
+    return [len(matcher.distinct_matches(sentence.lower())) for sentence in sentences]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    print("=== Summarization scoring benchmark ===")
+    for char_count in (100_000, 500_000):
+        text = synthetic_text(char_count)
+        sentences = comprehend_utils.split_sentences(text)
+        chunks = split_text_by_bytes(text, comprehend_utils.MAX_DOCUMENT_BYTES)
+        batches = -(-len(chunks) // comprehend_utils.MAX_BATCH_DOCUMENTS)
+        print(f"\n{len(text):,} chars, {len(sentences):,} sentences → "
+              f"{len(chunks)} Comprehend chunks in {batches} batch call(s)")
+        for phrase_count in (100, 500):
+            phrases = synthetic_phrases(phrase_count)
+            legacy_seconds, expected = timed(legacy_scores, sentences, phrases)
+            automaton_seconds, scores = timed(automaton_scores, sentences, phrases)
+            rank_seconds, summary = timed(comprehend_utils.rank_sentences, sentences, phrases)
+            in_order = [sentences.index(sentence) for sentence in summary] == sorted(sentences.index(s) for s in summary)
+            print(
+                f"  {len(phrases):>4} phrases: substring {legacy_seconds * 1000:8.1f} ms | "
+                f"automaton {automaton_seconds * 1000:7.1f} ms | rank {rank_seconds * 1000:7.1f} ms | "
+                f"scores match: {scores == expected} | document order: {in_order}"
+            )
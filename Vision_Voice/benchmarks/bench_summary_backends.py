@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_summarize import synthetic_text
+from chalicelib import comprehend_utils
+
+TEXT_SIZES = (500, 1000, 2000, 5000, 20000)
+
+
+def time_backend(text, backend, repeats):
+    """Median seconds for summarize_text with a backend, plus the summary it returned."""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        summary = comprehend_utils.summarize_text(text, backend=backend)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare local TextRank and Comprehend summarization latency")
+    parser.add_argument("--comprehend", action="store_true", help="Also time the Comprehend backend (network calls)")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per text size (median reported)")
+    args = parser.parse_args()
+
+    print("=== Summary backend latency ===")
+    print(f"auto uses the local backend up to {comprehend_utils.LOCAL_SUMMARY_MAX_CHARS} characters\n")
+    # The first local call pays for importing NumPy/SciPy; keep it out of the medians
+    comprehend_utils.summarize_text(synthetic_text(500), backend="local")
+    for size in TEXT_SIZES:
+        text = synthetic_text(size)
+        sentences = len(comprehend_utils.split_sentences(text))
+        local_seconds, summary = time_backend(text, "local", args.repeats)
+        line = (f"{size:>6,} chars, {sentences:>4} sentences: local {local_seconds * 1000:7.1f} ms "
+                f"({len(comprehend_utils.split_sentences(summary))} sentences)")
+        if args.comprehend:
+            remote_seconds, _ = time_backend(text, "comprehend", args.repeats)
+            line += f" | comprehend {remote_seconds * 1000:7.1f} ms | speedup {remote_seconds / local_seconds:5.1f}x"
+        line += f" | auto → {comprehend_utils.choose_summary_backend(text, 'auto')}"
+        print(line)
@@ -0,0 +1,83 @@
+import os
+import logging
+import threading
+
+from . import aws_tracing
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '50'))
+MAX_RETRY_ATTEMPTS = int(os.getenv('AWS_MAX_RETRY_ATTEMPTS', '5'))
+
+# (connect_timeout, read_timeout) in seconds per service
+SERVICE_TIMEOUTS = {
+    's3': (5, 60),
+    'textract': (5, 60),
+    'polly': (5, 30),
+    'translate': (5, 30),
+    'comprehend': (5, 30),
+    'cognito-idp': (3, 10),
+    'dynamodb': (2, 5),
+}
+DEFAULT_TIMEOUTS = (5, 30)
+
+_session = None
+_clients = {}
+_lock = threading.Lock()
+
+
+def client_config(service):
+    """Build the botocore Config used for a service's shared client."""
+    from botocore.config import Config
+
+    connect_timeout, read_timeout = SERVICE_TIMEOUTS.get(service, DEFAULT_TIMEOUTS)
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries={'mode': 'adaptive', 'max_attempts': MAX_RETRY_ATTEMPTS}
+    )
+
+
+def get_client(service, region=None, endpoint_url=None):
+    """Return the shared client for (service, region, endpoint_url), creating it once per process.
+
+    Clients are thread-safe, so every module and session reuses the same
+    connection pool and resolved credentials. boto3 is only imported here, on
+    first use, to keep module import cheap.
+    """
+    region = region or os.getenv('AWS_REGION')
+    key = (service, region, endpoint_url)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    global _session
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if _session is None:
+                import boto3
+                _session = boto3.session.Session()
+            client = _session.client(
+                service,
+                region_name=region,
+                endpoint_url=endpoint_url,
+                config=client_config(service)
+            )
+            if aws_tracing.TRACING_ENABLED:
+                aws_tracing.attach(client)
+            _clients[key] = client
+            logger.info(f"Audit: AWS client created - Service: {service}, Region: {region or 'default'}")
+    return client
+
+
+def reset_clients():
+    """Drop all cached clients so the next call builds fresh ones."""
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+TRACING_ENABLED = os.getenv('AWS_TRACING', 'true').lower() in ('true', '1', 't')
+# Completed calls kept in memory for export
+TRACE_BUFFER_SIZE = int(os.getenv('AWS_TRACE_BUFFER', '10000'))
+# Optional JSON-lines file every completed call is appended to
+TRACE_LOG_PATH = os.getenv('AWS_TRACE_LOG_PATH')
+
+# Error codes AWS services use for throttling
+THROTTLE_CODES = frozenset((
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottledException",
+    "TooManyRequestsException", "ProvisionedThroughputExceededException", "RequestLimitExceeded",
+    "RequestThrottled", "SlowDown", "LimitExceededException", "PriorRequestNotComplete",
+))
+
+_CONTEXT_KEY = "visionvoice_trace"
+_HANDLER_PREFIX = "visionvoice-trace"
+
+# Streamlit session or pipeline job the current AWS calls belong to
+current_trace_id = contextvars.ContextVar("visionvoice_trace_id", default=None)
+
+_records = deque(maxlen=TRACE_BUFFER_SIZE)
+_lock = threading.Lock()
+
+
+@contextmanager
+def trace(trace_id):
+    """Attribute AWS calls made inside the block (and in pipeline threads it starts) to trace_id."""
+    token = current_trace_id.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        current_trace_id.reset(token)
+
+
+def _body_size(body):
+    """Request body size without consuming file-like bodies."""
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, dict):
+        return len(json.dumps(body).encode("utf-8"))
+    try:
+        position = body.tell()
+        size = body.seek(0, os.SEEK_END) - position
+        body.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+def _response_size(http_response, model):
+    """Response body size from Content-Length, or from the already-read body when not streaming."""
+    length = (getattr(http_response, "headers", None) or {}).get("content-length")
+    if length is not None:
+        return int(length)
+    if model.has_streaming_output or getattr(http_response, "raw", None) is None:
+        return 0
+    return len(http_response.content or b"")
+
+
+def _error_code(parsed):
+    return ((parsed or {}).get("Error") or {}).get("Code")
+
+
+def _before_call(model, params, context, **kwargs):
+    context[_CONTEXT_KEY] = {
+        "trace_id": current_trace_id.get(),
+        "service": model.service_model.service_name,
+        "operation": model.name,
+        "start": time.time(),
+        "started": time.perf_counter(),
+        "bytes_out": _body_size(params.get("body")),
+        "attempts": 0,
+        "throttles": 0,
+    }
+
+
+def _needs_retry(request_dict, response=None, caught_exception=None, **kwargs):
+    """Count every HTTP attempt and the ones AWS throttled, including attempts that were retried."""
+    state = (request_dict.get("context") or {}).get(_CONTEXT_KEY)
+    if state is None:
+        return
+    state["attempts"] += 1
+    if response is not None and _error_code(response[1]) in THROTTLE_CODES:
+        state["throttles"] += 1
+
+
+def _after_call(http_response, parsed, model, context, **kwargs):
+    state = context.pop(_CONTEXT_KEY, None)
+    if state is None:
+        return
+    error = _error_code(parsed) if http_response.status_code >= 300 else None
+    if not state["attempts"] and error in THROTTLE_CODES:
+        # Stubbed or short-circuited calls never reach the retry handler
+        state["throttles"] = 1
+    retries = (parsed or {}).get("ResponseMetadata", {}).get("RetryAttempts", 0)
+    _finish(state, http_response.status_code, error, max(retries, state["attempts"] - 1),
+            _response_size(http_response, model))
+
+
+def _after_call_error(exception, context, **kwargs):
+    state = context.pop(_CONTEXT_KEY, None)
+    if state is not None:
+        _finish(state, None, type(exception).__name__, max(state["attempts"] - 1, 0), 0)
+
+
+def _finish(state, status, error, retries, bytes_in):
+    record = {
+        "trace_id": state["trace_id"],
+        "service": state["service"],
+        "operation": state["operation"],
+        "start": state["start"],
+        "seconds": time.perf_counter() - state["started"],
+        "status": status,
+        "error": error,
+        "retries": retries,
+        "throttles": state["throttles"],
+        "bytes_out": state["bytes_out"],
+        "bytes_in": bytes_in,
+    }
+    with _lock:
+        _records.append(record)
+        if TRACE_LOG_PATH:
+            try:
+                with open(TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not append AWS trace to {TRACE_LOG_PATH}: {e}")
+
+
+def attach(client):
+    """Register the tracing handlers on a client's event system; safe to call more than once.
+
+    before-call is registered first on the same 'before-call.*.*' node a
+    botocore Stubber uses, so it still runs when the Stubber answers the
+    call itself, whichever was attached first.
+    """
+    events = client.meta.events
+    events.register_first("before-call.*.*", _before_call, unique_id=f"{_HANDLER_PREFIX}-before-call")
+    events.register("needs-retry", _needs_retry, unique_id=f"{_HANDLER_PREFIX}-needs-retry")
+    events.register("after-call.*.*", _after_call, unique_id=f"{_HANDLER_PREFIX}-after-call")
+    events.register("after-call-error.*.*", _after_call_error, unique_id=f"{_HANDLER_PREFIX}-after-call-error")
+    return client
+
+
+def records(trace_id=None):
+    """Return completed calls, oldest first, optionally only those of one trace."""
+    with _lock:
+        return [record for record in _records if trace_id is None or record["trace_id"] == trace_id]
+
+
+def clear():
+    with _lock:
+        _records.clear()
+
+
+def summary(trace_id=None):
+    """Aggregate the buffered calls (optionally of one trace) per service and operation."""
+    return summarize_calls(records(trace_id))
+
+
+def summarize_calls(calls):
+    """Aggregate call records per (service, operation): requests, errors, retries, throttles, bytes and seconds."""
+    totals = {}
+    for record in calls:
+        entry = totals.setdefault((record["service"], record["operation"]), {
+            "service": record["service"],
+            "operation": record["operation"],
+            "requests": 0, "errors": 0, "retries": 0, "throttles": 0,
+            "bytes_out": 0, "bytes_in": 0, "seconds": 0.0,
+        })
+        entry["requests"] += 1
+        entry["errors"] += record["error"] is not None
+        for field in ("retries", "throttles", "bytes_out", "bytes_in", "seconds"):
+            entry[field] += record[field]
+    return list(totals.values())
+
+
+def export_jsonl(output, trace_id=None):
+    """Write calls as JSON lines to a path or text file object; returns the number written."""
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, "w", encoding="utf-8") as f:
+            return export_jsonl(f, trace_id)
+    selected = records(trace_id)
+    for record in selected:
+        output.write(json.dumps(record) + "\n")
+    return len(selected)
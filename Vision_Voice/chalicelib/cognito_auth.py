@@ -1,9 +1,35 @@
 import os
 import logging
+import threading
 import streamlit as st
-from authlib.integrations.requests_client import OAuth2Session
-import requests
-import json
+from .cache_store import DiskCache, cache_path
+
+# Discovery documents and JWKS rarely change; keys rotate far less often than this
+OIDC_CACHE_TTL = int(os.getenv('OIDC_CACHE_TTL', str(24 * 3600)))
+
+_http_session = None
+_http_lock = threading.Lock()
+_oidc_cache = None
+
+def get_http_session():
+    """Return a process-wide pooled requests.Session for IdP calls."""
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=2))
+            _http_session = session
+    return _http_session
+
+def get_oidc_cache():
+    """Return the on-disk cache for discovery documents and JWKS."""
+    global _oidc_cache
+    if _oidc_cache is None:
+        _oidc_cache = DiskCache(cache_path("oidc_cache.db"), max_bytes=1024 * 1024, ttl=OIDC_CACHE_TTL)
+    return _oidc_cache
 
 class CognitoAuth:
     def __init__(self):
@@ -21,7 +47,8 @@ class CognitoAuth:
         self._initialize_endpoints()
         self._validate_metadata()
         
-        # Initialize OAuth2 session
+        # Initialize OAuth2 session (authlib is imported lazily to keep app startup fast)
+        from authlib.integrations.requests_client import OAuth2Session
         self.oauth = OAuth2Session(
             client_id=self.client_id,
             client_secret=self.client_secret,
@@ -29,16 +56,30 @@ class CognitoAuth:
             scope='openid email profile'
         )
 
+    def _fetch_json(self, url, use_cache=True):
+        """GET a JSON document through the pooled session, using the on-disk cache"""
+        cache = get_oidc_cache()
+        if use_cache:
+            cached = cache.get(url)
+            if cached is not None:
+                self.logger.info(f"Using cached document for {url}")
+                return cached
+        response = get_http_session().get(url, timeout=5)
+        response.raise_for_status()
+        document = response.json()
+        cache.set(url, document)
+        return document
+
     def _initialize_endpoints(self):
         """Initialize Cognito endpoints with fallback strategies"""
+        import requests
+
         try:
             self.authority = f"https://cognito-idp.{self.region}.amazonaws.com/{self.user_pool_id}"
             self.metadata_url = f"{self.authority}/.well-known/openid-configuration"
             
             self.logger.info(f"Attempting connection to {self.metadata_url}")
-            response = requests.get(self.metadata_url, timeout=5)
-            response.raise_for_status()
-            self.metadata = response.json()
+            self.metadata = self._fetch_json(self.metadata_url)
             self.logger.info("Successfully connected to Cognito IdP endpoint")
             
         except requests.exceptions.RequestException as e:
@@ -47,6 +88,8 @@ class CognitoAuth:
 
     def _try_domain_fallback(self):
         """Attempt domain-based fallback connection"""
+        import requests
+
         cognito_domain = os.getenv('COGNITO_DOMAIN')
         if not cognito_domain:
             raise ConnectionError("No fallback COGNITO_DOMAIN environment variable set")
@@ -54,12 +97,7 @@ class CognitoAuth:
         domain = f"https://{cognito_domain}.auth.{self.region}.amazoncognito.com"
         try:
             self.logger.info(f"Attempting domain fallback to {domain}")
-            response = requests.get(
-                f"{domain}/.well-known/openid-configuration", 
-                timeout=5
-            )
-            response.raise_for_status()
-            self.metadata = response.json()
+            self.metadata = self._fetch_json(f"{domain}/.well-known/openid-configuration")
             self.logger.info("Successfully connected via domain fallback")
             
         except requests.exceptions.RequestException as domain_error:
@@ -115,10 +153,47 @@ class CognitoAuth:
             st.session_state.clear()
             raise RuntimeError("Authentication failed") from e
 
-    def get_user_info(self, access_token):
-        """Get user info using the access token"""
+    def _get_signing_key(self, kid):
+        """Return the JWK for a key ID, refetching the JWKS once if the key is unknown"""
+        jwks_uri = self.metadata.get('jwks_uri', f"{self.authority}/.well-known/jwks.json")
+        for use_cache in (True, False):
+            jwks = self._fetch_json(jwks_uri, use_cache=use_cache)
+            for key in jwks.get('keys', []):
+                if key.get('kid') == kid:
+                    return key
+        raise ValueError(f"Signing key {kid} not found in JWKS")
+
+    def verify_id_token(self, id_token, access_token=None):
+        """Verify the ID token signature and claims locally and return the claims"""
+        from jose import jwt
+
+        header = jwt.get_unverified_header(id_token)
+        claims = jwt.decode(
+            id_token,
+            self._get_signing_key(header.get('kid')),
+            algorithms=['RS256'],
+            audience=self.client_id,
+            issuer=self.metadata.get('issuer', self.authority),
+            access_token=access_token
+        )
+        if claims.get('token_use') != 'id':
+            raise ValueError("Token is not an ID token")
+        return claims
+
+    def get_user_info(self, access_token, id_token=None):
+        """Get user info from the verified ID token, falling back to the userinfo endpoint"""
+        if id_token:
+            try:
+                claims = self.verify_id_token(id_token, access_token=access_token)
+                user_info = dict(claims)
+                user_info.setdefault('username', claims.get('cognito:username', claims.get('sub')))
+                self.logger.info(f"Audit: User info verified from ID token - User ID: {claims.get('sub', 'UNKNOWN')}")
+                return user_info
+            except Exception as e:
+                self.logger.warning(f"ID token verification failed, using userinfo endpoint: {str(e)}")
+
         try:
-            response = requests.get(
+            response = get_http_session().get(
                 self.metadata['userinfo_endpoint'],
                 headers={'Authorization': f'Bearer {access_token}'},
                 timeout=5
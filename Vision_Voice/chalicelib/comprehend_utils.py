@@ -1,6 +1,13 @@
-import boto3
+import os
+import time
 import logging
+import importlib.util
 from botocore.exceptions import BotoCoreError, ClientError
+from . import metrics
+from .aws_clients import get_client
+from .metrics import instrument
+from .phrase_matcher import PhraseMatcher
+from .text_processing import split_text_by_bytes
 import re
 
 # Set up logging
@@ -14,38 +21,101 @@ if not logger.hasHandlers():
     handler.setFormatter(formatter)
     logger.addHandler(handler)
 
-# Create the Comprehend client
-comprehend = boto3.client('comprehend')
+# Comprehend limits: bytes per document and documents per BatchDetectKeyPhrases call
+MAX_DOCUMENT_BYTES = 5000
+MAX_BATCH_DOCUMENTS = 25
 
+# 'comprehend' (key phrases), 'local' (TextRank, no network call) or 'auto' (local up to the length below)
+SUMMARY_BACKENDS = ("auto", "comprehend", "local")
+SUMMARY_BACKEND = os.getenv('SUMMARY_BACKEND', 'auto').lower()
+LOCAL_SUMMARY_MAX_CHARS = int(os.getenv('LOCAL_SUMMARY_MAX_CHARS', '2000'))
+# TextRank needs scipy, which the Lambda package leaves out to stay under the size limit
+LOCAL_SUMMARY_AVAILABLE = importlib.util.find_spec("scipy") is not None
 
-import re
+@instrument("comprehend")
+def detect_key_phrases(text, language_code='en'):
+    """Return the lowercase key phrases (longer than two characters) Comprehend finds in the text.
 
-def summarize_text(text, max_lines=4):
+    Texts over the per-document limit are split at sentence boundaries and
+    sent through BatchDetectKeyPhrases, up to 25 chunks per call.
     """
-    Generate a concise summary by extracting key sentences
-    based on AWS Comprehend key phrases.
+    chunks = [chunk for chunk in split_text_by_bytes(text, MAX_DOCUMENT_BYTES) if chunk.strip()]
+    if len(chunks) <= 1:
+        results = [get_client('comprehend').detect_key_phrases(Text=text, LanguageCode=language_code)]
+    else:
+        results = []
+        for start in range(0, len(chunks), MAX_BATCH_DOCUMENTS):
+            response = get_client('comprehend').batch_detect_key_phrases(
+                TextList=chunks[start:start + MAX_BATCH_DOCUMENTS],
+                LanguageCode=language_code
+            )
+            for error in response.get('ErrorList', []):
+                logger.warning(f"Key phrase detection failed for chunk {start + error['Index']}: {error.get('ErrorMessage')}")
+            results.extend(response.get('ResultList', []))
+        logger.info(f"🔍 Key phrases detected in {len(chunks)} chunks")
+    return {
+        phrase['Text'].lower()
+        for result in results
+        for phrase in result.get('KeyPhrases', [])
+        if len(phrase['Text']) > 2
+    }
+
+def split_sentences(text):
+    """Split text into sentences at ., ! or ? followed by whitespace."""
+    return re.split(r'(?<=[.!?])\s+', text.strip())
+
+def rank_sentences(sentences, key_phrases, max_lines=4):
+    """Pick the max_lines sentences containing the most distinct key phrases, in document order.
+
+    All phrases are matched in a single pass per sentence with an
+    Aho-Corasick automaton; ties go to the earlier sentence.
     """
-    try:
-        logger.info("🔍 Extracting key phrases from text")
-        response = comprehend.detect_key_phrases(Text=text, LanguageCode='en')
-        key_phrases = {p['Text'].lower() for p in response.get('KeyPhrases', []) if len(p['Text']) > 2}
+    matcher = PhraseMatcher(key_phrases)
+    scores = [len(matcher.distinct_matches(sentence.lower())) for sentence in sentences]
+    ranked = sorted(range(len(sentences)), key=lambda index: -scores[index])[:max_lines]
+    return [sentences[index] for index in sorted(ranked)]
 
-        # Split the text into sentences
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-        sentence_scores = []
+def choose_summary_backend(text, backend=None):
+    """Resolve 'auto' (or the SUMMARY_BACKEND default) to 'local' or 'comprehend' by text length."""
+    backend = (backend or SUMMARY_BACKEND).lower()
+    if backend not in SUMMARY_BACKENDS:
+        raise ValueError(f"Unknown summary backend: {backend}")
+    if backend == "auto":
+        return "local" if LOCAL_SUMMARY_AVAILABLE and len(text) <= LOCAL_SUMMARY_MAX_CHARS else "comprehend"
+    if backend == "local" and not LOCAL_SUMMARY_AVAILABLE:
+        raise ValueError("The local summary backend requires scipy")
+    return backend
 
-        for sentence in sentences:
-            score = sum(1 for phrase in key_phrases if phrase in sentence.lower())
-            sentence_scores.append((score, sentence))
+def summarize_text(text, max_lines=4, backend=None):
+    """
+    Generate a concise summary by extracting key sentences,
+    scored by AWS Comprehend key phrases or by local TextRank.
+    Metrics are recorded under the backend that ran, e.g. 'local.summarize_text'.
+    """
+    backend = choose_summary_backend(text, backend)
+    return metrics.call(f"{backend}.summarize_text", _summarize_text, text, max_lines, backend, payload_in=text)
+
+def _summarize_text(text, max_lines, backend):
+    try:
+        start = time.perf_counter()
+        sentences = split_sentences(text)
+        if backend == "local":
+            from .local_summarizer import rank_sentences as rank_central_sentences
 
-        # Sort by score and select top N sentences
-        sentence_scores.sort(reverse=True)
-        selected_sentences = [s for _, s in sentence_scores[:max_lines]]
+            logger.info("🔍 Ranking sentences locally with TextRank")
+            selected_sentences = rank_central_sentences(sentences, max_lines)
+        else:
+            logger.info("🔍 Extracting key phrases from text")
+            key_phrases = detect_key_phrases(text)
+
+            # Keep the highest-scoring sentences in their original order
+            selected_sentences = rank_sentences(sentences, key_phrases, max_lines)
 
         # Combine selected sentences and return a summary
         summary = ' '.join(selected_sentences).strip()
 
-        logger.info(f"✅ Summary generated with {len(selected_sentences)} key sentences")
+        logger.info(f"✅ Summary generated with {len(selected_sentences)} key sentences "
+                    f"({backend}, {(time.perf_counter() - start) * 1000:.0f} ms)")
         return summary
 
     except (ClientError, BotoCoreError) as e:
@@ -54,4 +124,3 @@ def summarize_text(text, max_lines=4):
     except Exception as e:
         logger.error("❌ Unexpected error during summarization", exc_info=True)
         raise RuntimeError("Error while summarizing text") from e
-
@@ -0,0 +1,70 @@
+import io
+import os
+import time
+import logging
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Long-side resolution that keeps handwriting legible for OCR
+MAX_DIMENSION = int(os.getenv('OCR_MAX_DIMENSION', '2400'))
+# Payload budget, comfortably under Textract's 5 MB synchronous image limit
+MAX_BYTES = int(os.getenv('OCR_MAX_BYTES', str(4 * 1024 * 1024)))
+JPEG_QUALITIES = (85, 75, 65, 55)
+PREPROCESS_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def should_preprocess(filename):
+    """Return True for single-image formats the preprocessor handles."""
+    return filename.lower().endswith(PREPROCESS_EXTENSIONS)
+
+
+def _encode_jpeg(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def preprocess_image(data, max_dimension=MAX_DIMENSION, max_bytes=MAX_BYTES, grayscale=True):
+    """Orient, downscale, grayscale and recompress an image for OCR.
+
+    Returns (data, stats) where stats holds the original and processed sizes,
+    bytes saved and the preprocessing time. The original bytes are returned
+    unchanged when recompression would not make them smaller.
+    """
+    from PIL import Image, ImageOps
+
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("L" if grayscale else "RGB")
+    if max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    processed = None
+    while processed is None:
+        for quality in JPEG_QUALITIES:
+            candidate = _encode_jpeg(image, quality)
+            if len(candidate) <= max_bytes:
+                processed = candidate
+                break
+        else:
+            # Still over budget at the lowest quality: shrink and try again
+            image = image.resize((max(1, int(image.width * 0.8)), max(1, int(image.height * 0.8))), Image.LANCZOS)
+
+    if len(processed) >= len(data) and len(data) <= max_bytes:
+        processed = data
+
+    stats = {
+        "original_bytes": len(data),
+        "processed_bytes": len(processed),
+        "bytes_saved": len(data) - len(processed),
+        "dimensions": image.size,
+        "seconds": time.perf_counter() - start,
+    }
+    logger.info(
+        f"Audit: Image preprocessed - {stats['original_bytes']} → {stats['processed_bytes']} bytes, "
+        f"Size: {image.size[0]}x{image.size[1]}, Time: {stats['seconds'] * 1000:.0f} ms"
+    )
+    return processed, stats
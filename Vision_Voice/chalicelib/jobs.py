@@ -0,0 +1,215 @@
+import io
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import aws_tracing
+from .cache_store import cache_path
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+JOB_BUCKET = os.getenv('JOB_BUCKET', os.getenv('S3_BUCKET_NAME', 'visionvoicegroupproject'))
+JOB_PREFIX = 'jobs/'
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobNotFound(Exception):
+    """Raised when a job ID has no stored record."""
+
+
+class JobStore:
+    """Job records (JSON) and artifacts (bytes) addressed by job ID and name."""
+
+    def get_artifact(self, job_id, name):
+        """Return the artifact bytes, or None if it was never stored."""
+        raise NotImplementedError
+
+    def put_artifact(self, job_id, name, data):
+        raise NotImplementedError
+
+    def get_record(self, job_id):
+        data = self.get_artifact(job_id, "job.json")
+        if data is None:
+            raise JobNotFound(job_id)
+        return json.loads(data)
+
+    def put_record(self, job_id, record):
+        self.put_artifact(job_id, "job.json", json.dumps(record).encode("utf-8"))
+
+    def update_record(self, job_id, **changes):
+        record = self.get_record(job_id)
+        record.update(changes, updated=time.time())
+        self.put_record(job_id, record)
+        return record
+
+
+class LocalJobStore(JobStore):
+    """Job store in a local directory, for `chalice local` and development."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, job_id, name):
+        return os.path.join(self.root, job_id, name)
+
+    def get_artifact(self, job_id, name):
+        try:
+            with open(self._path(job_id, name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_artifact(self, job_id, name, data):
+        path = self._path(job_id, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class S3JobStore(JobStore):
+    """Job store under jobs/<job_id>/ in S3, shared by every API instance."""
+
+    def __init__(self, bucket, prefix=JOB_PREFIX):
+        self.bucket = bucket
+        self.prefix = prefix
+
+    @property
+    def client(self):
+        from .aws_clients import get_client
+        return get_client('s3')
+
+    def get_artifact(self, job_id, name):
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=f"{self.prefix}{job_id}/{name}")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        return response["Body"].read()
+
+    def put_artifact(self, job_id, name, data):
+        self.client.put_object(Bucket=self.bucket, Key=f"{self.prefix}{job_id}/{name}", Body=data)
+
+
+def create_job_store():
+    """Build the store selected by JOB_STORE ('local' or 's3')."""
+    if os.getenv('JOB_STORE', 'local').lower() == 's3':
+        return S3JobStore(JOB_BUCKET)
+    return LocalJobStore(os.getenv('JOB_STORE_DIR') or cache_path("jobs"))
+
+
+def submit_job(store, data, filename, profile, owner=None):
+    """Store an uploaded document and its queued job record; return the record.
+
+    owner is the API user the job belongs to and whose upload quota it used.
+    """
+    from .pipeline import content_hash
+
+    job_id = uuid.uuid4().hex
+    store.put_artifact(job_id, "source", data)
+    record = {
+        "job_id": job_id,
+        "status": "queued",
+        "filename": filename,
+        "digest": content_hash(data),
+        "profile": profile,
+        "owner": owner,
+        "created": time.time(),
+    }
+    store.put_record(job_id, record)
+    logger.info(f"Audit: Job submitted - Job: {job_id}, File: {filename}, Bytes: {len(data)}")
+    return record
+
+
+def process_job(store, job_id):
+    """Run extraction and cleaning for a queued job and store the text artifacts.
+
+    The job's AWS calls are traced under its ID and stored as trace.jsonl.
+    """
+    from . import s3_utils
+    from .pipeline import SourceDocument, build_document_pipeline
+
+    with aws_tracing.trace(job_id):
+        record = store.update_record(job_id, status="running")
+        try:
+            source = SourceDocument(store.get_artifact(job_id, "source"), record["filename"])
+            pipeline = build_document_pipeline()
+            pipeline.set_params("extract", profile=record["profile"])
+            timings = {}
+            for stage, artifact in (("extract", "raw.txt"), ("clean", "text.txt")):
+                store.put_artifact(job_id, artifact, pipeline.run(stage, source).encode("utf-8"))
+                # Later runs see earlier stages as memo hits; keep each stage's first timing
+                for name, run in pipeline.last_run.items():
+                    timings.setdefault(name, run["seconds"])
+            # Background archival must finish before a Lambda invocation is frozen
+            s3_utils.wait_for_archival()
+            store.update_record(job_id, status="done", timings=timings)
+            logger.info(f"Audit: Job finished - Job: {job_id}")
+        except Exception as e:
+            logger.error(f"Job failed - Job: {job_id}, Error: {e}", exc_info=True)
+            store.update_record(job_id, status="failed", error=str(e))
+            _refund_upload(record.get("owner"))
+
+    calls = io.StringIO()
+    aws_tracing.export_jsonl(calls, job_id)
+    try:
+        store.put_artifact(job_id, "trace.jsonl", calls.getvalue().encode("utf-8"))
+    except Exception as e:
+        logger.warning(f"Could not store AWS trace - Job: {job_id}, Error: {e}")
+
+
+def _refund_upload(owner):
+    """Return the upload a failed job reserved from its owner's monthly quota."""
+    if not owner:
+        return
+    from .subscription import get_quota_tracker
+
+    try:
+        get_quota_tracker().refund(owner)
+    except Exception as e:
+        logger.error(f"Upload refund failed - User: {owner}, Error: {e}")
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def run_in_thread(store, job_id):
+    """Process a job on an in-process worker thread (`chalice local`)."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = ThreadPoolExecutor(max_workers=int(os.getenv('JOB_WORKERS', '4')), thread_name_prefix="job")
+    return _runner.submit(process_job, store, job_id)
+
+
+def invoke_async(job_id, function_name):
+    """Hand a job to the worker Lambda with an asynchronous (Event) invocation."""
+    from .aws_clients import get_client
+
+    get_client('lambda').invoke(
+        FunctionName=function_name,
+        InvocationType='Event',
+        Payload=json.dumps({"job_id": job_id}).encode("utf-8")
+    )
+
+
+def text_artifact(store, job_id, name, build):
+    """Return a derived text artifact, building and storing it on first request."""
+    data = store.get_artifact(job_id, name)
+    if data is not None:
+        return data.decode("utf-8")
+    text = build()
+    store.put_artifact(job_id, name, text.encode("utf-8"))
+    return text
@@ -0,0 +1,117 @@
+import logging
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Lines at least this wide (fraction of page width) span columns and act as section breaks
+FULL_WIDTH_RATIO = 0.5
+# Horizontal gutter between columns, in multiples of the median line height
+GUTTER_FACTOR = 1.0
+# Lines each side of a gutter needs before the gap counts as a column break
+MIN_COLUMN_LINES = 2
+# Vertical gap that starts a new paragraph, in multiples of the median line height
+PARAGRAPH_FACTOR = 0.8
+BULLET_PREFIXES = ('-', '*', '•')
+
+
+def _line_arrays(blocks):
+    """Load LINE block text and geometry into parallel NumPy arrays."""
+    import numpy as np
+
+    texts = []
+    geometry = []
+    for block in blocks:
+        if block.get('BlockType') == 'LINE':
+            box = block['Geometry']['BoundingBox']
+            texts.append(block['Text'].strip())
+            geometry.append((box.get('Left', 0.0), box.get('Top', 0.0), box.get('Width', 0.0), box.get('Height', 0.0)))
+    boxes = np.array(geometry, dtype=np.float64).reshape(-1, 4)
+    return texts, boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+
+
+def _is_column_break(before, after, top, bottom):
+    """Return True if two groups of lines side by side read as separate columns."""
+    if min(len(before), len(after)) < MIN_COLUMN_LINES:
+        return False
+    return min(bottom[before].max(), bottom[after].max()) > max(top[before].min(), top[after].min())
+
+
+def _assign_columns(left, right, top, bottom, gutter):
+    """Cluster lines into columns separated by vertical gutters wider than `gutter`.
+
+    A gutter only separates columns when the lines on both sides overlap
+    vertically and each side has at least MIN_COLUMN_LINES lines, so a
+    header row such as a title and a date stays in one column.
+    """
+    import numpy as np
+
+    order = np.argsort(left, kind='stable')
+    reach = np.maximum.accumulate(right[order])
+    gaps = left[order][1:] - reach[:-1]
+    bounds = [0] + (np.flatnonzero(gaps > gutter) + 1).tolist() + [len(left)]
+    groups = [order[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    merged = [groups[0]]
+    for group in groups[1:]:
+        if _is_column_break(merged[-1], group, top, bottom):
+            merged.append(group)
+        else:
+            merged[-1] = np.concatenate((merged[-1], group))
+    columns = np.empty(len(left), dtype=np.int64)
+    for column, members in enumerate(merged):
+        columns[members] = column
+    return columns
+
+
+def reading_order(left, top, width, height):
+    """Return (order, paragraph_breaks) for lines given their bounding boxes.
+
+    Lines are clustered into columns by horizontal gutters; full-width lines
+    split the page into sections that are read one after another, each
+    section column by column, top to bottom. paragraph_breaks[i] is True
+    when the i-th line in reading order starts a new paragraph.
+    """
+    import numpy as np
+
+    count = len(top)
+    if count == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+
+    line_height = float(np.median(height)) or 0.01
+    wide = width >= FULL_WIDTH_RATIO
+
+    columns = np.full(count, -1, dtype=np.int64)
+    narrow = ~wide
+    if narrow.any():
+        columns[narrow] = _assign_columns(left[narrow], (left + width)[narrow], top[narrow],
+                                          (top + height)[narrow], GUTTER_FACTOR * line_height)
+
+    # Section = number of full-width lines above; a full-width line opens the section below it
+    wide_tops = np.sort(top[wide])
+    sections = np.searchsorted(wide_tops, top, side='right')
+
+    order = np.lexsort((left, top, columns, sections))
+
+    bottom = top + height
+    gap = top[order][1:] - bottom[order][:-1]
+    same_block = (sections[order][1:] == sections[order][:-1]) & (columns[order][1:] == columns[order][:-1])
+    breaks = np.concatenate(([False], ~same_block | (gap > PARAGRAPH_FACTOR * line_height)))
+    return order, breaks
+
+
+def reconstruct_text(blocks):
+    """Rebuild a page's text from Textract LINE blocks in column-aware reading order."""
+    texts, left, top, width, height = _line_arrays(blocks)
+    order, breaks = reading_order(left, top, width, height)
+
+    output = []
+    for index, starts_paragraph in zip(order.tolist(), breaks.tolist()):
+        text = texts[index]
+        if starts_paragraph:
+            output.append("")
+        # Add bullet-like formatting if line starts with dash or bullet
+        if text.startswith(BULLET_PREFIXES):
+            text = f"• {text.lstrip('-•* ').strip()}"
+        output.append(text)
+    return "\n".join(output)
@@ -0,0 +1,82 @@
+import re
+
+# TextRank damping factor and power-iteration stopping rule
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9']*")
+
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers herself him himself his how i if in into is it its itself just me more most my myself no nor not
+now of off on once only or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under until up very was we
+were what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def tokenize(sentence):
+    """Lowercase content words of a sentence, without stop words or one-letter tokens."""
+    return [token for token in TOKEN_PATTERN.findall(sentence.lower())
+            if len(token) > 1 and token not in STOP_WORDS]
+
+
+def tfidf_matrix(sentences):
+    """Sparse sentence x term TF-IDF matrix with L2-normalized rows."""
+    import numpy as np
+    from scipy import sparse
+
+    vocabulary = {}
+    rows, cols = [], []
+    for row, sentence in enumerate(sentences):
+        for token in tokenize(sentence):
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(len(sentences), len(vocabulary))
+    )
+    counts.sum_duplicates()
+
+    document_frequency = np.bincount(counts.indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    weighted = counts.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ weighted
+
+
+def textrank_scores(sentences):
+    """TextRank centrality of each sentence over the cosine-similarity graph."""
+    import numpy as np
+    from scipy import sparse
+
+    count = len(sentences)
+    vectors = tfidf_matrix(sentences)
+    similarity = (vectors @ vectors.T).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    # Row-normalize into a transition matrix; isolated sentences jump uniformly
+    out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    out_weight[dangling] = 1
+    transition_t = (sparse.diags(1 / out_weight) @ similarity).T.tocsr()
+
+    scores = np.full(count, 1 / count)
+    for _ in range(MAX_ITERATIONS):
+        previous = scores
+        scores = (1 - DAMPING) / count + DAMPING * (transition_t @ scores + scores[dangling].sum() / count)
+        if np.abs(scores - previous).sum() < TOLERANCE:
+            break
+    return scores
+
+
+def rank_sentences(sentences, max_lines=4):
+    """Pick the max_lines most central sentences, in document order; ties go to the earlier sentence."""
+    if len(sentences) <= max_lines:
+        return list(sentences)
+    scores = textrank_scores(sentences)
+    ranked = sorted(range(len(sentences)), key=lambda index: -scores[index])[:max_lines]
+    return [sentences[index] for index in sorted(ranked)]
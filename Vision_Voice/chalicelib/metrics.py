@@ -0,0 +1,255 @@
+import os
+import time
+import bisect
+import inspect
+import logging
+import threading
+import functools
+import contextvars
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# Seconds, from a cached lookup to a long Textract job
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+# Bytes, from a short sentence to a multi-page scan
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Subscription tier of the caller; set per Streamlit run and carried into pipeline threads
+current_tier = contextvars.ContextVar("visionvoice_tier", default="unknown")
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf past the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms keyed by metric name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}
+
+    def define(self, name, kind, help_text, labels, buckets=None):
+        self._families[name] = {"kind": kind, "help": help_text, "labels": labels, "buckets": buckets, "series": {}}
+
+    def inc(self, name, labels, amount=1):
+        family = self._families[name]
+        with self._lock:
+            family["series"][labels] = family["series"].get(labels, 0) + amount
+
+    def observe(self, name, labels, value):
+        family = self._families[name]
+        with self._lock:
+            histogram = family["series"].get(labels)
+            if histogram is None:
+                histogram = family["series"][labels] = Histogram(family["buckets"])
+            histogram.observe(value)
+
+    def series(self, name):
+        """Return a copy of a family's {label values: value or Histogram} series."""
+        with self._lock:
+            return dict(self._families[name]["series"])
+
+    def reset(self):
+        with self._lock:
+            for family in self._families.values():
+                family["series"].clear()
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, family in self._families.items():
+                lines.append(f"# HELP {name} {family['help']}")
+                lines.append(f"# TYPE {name} {family['kind']}")
+                for values, value in sorted(family["series"].items()):
+                    labels = _format_labels(family["labels"], values)
+                    if family["kind"] != "histogram":
+                        lines.append(f"{name}{{{labels}}} {_format_number(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(family["buckets"] + (float("inf"),), value.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else _format_number(bound)
+                        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{labels}}} {_format_number(value.sum)}")
+                    lines.append(f"{name}_count{{{labels}}} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+registry.define("visionvoice_stage_duration_seconds", "histogram",
+                "Wall time of chalicelib entry points and pipeline stages.", ("stage", "tier"), LATENCY_BUCKETS)
+registry.define("visionvoice_stage_payload_bytes", "histogram",
+                "Size of stage inputs and outputs.", ("stage", "tier", "direction"), SIZE_BUCKETS)
+registry.define("visionvoice_stage_errors_total", "counter",
+                "Stage calls that raised, by exception type.", ("stage", "tier", "error"))
+registry.define("visionvoice_stage_in_flight", "gauge",
+                "Stage calls currently running.", ("stage", "tier"))
+
+
+def payload_size(value):
+    """Bytes in a stage payload (text is measured as UTF-8); None when it has no meaningful size."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        sizes = [payload_size(item) for item in value]
+        sizes = [size for size in sizes if size is not None]
+        return sum(sizes) if sizes else None
+    data = getattr(value, "data", None)
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    return None
+
+
+def call(stage, func, *args, payload_in=None, measure_result=True, **kwargs):
+    """Call func and record its latency, in-flight count, errors and payload sizes under stage."""
+    tier = current_tier.get()
+    labels = (stage, tier)
+    size = payload_size(payload_in)
+    if size is not None:
+        registry.observe("visionvoice_stage_payload_bytes", labels + ("in",), size)
+    registry.inc("visionvoice_stage_in_flight", labels)
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        registry.inc("visionvoice_stage_errors_total", labels + (type(e).__name__,))
+        raise
+    finally:
+        registry.observe("visionvoice_stage_duration_seconds", labels, time.perf_counter() - start)
+        registry.inc("visionvoice_stage_in_flight", labels, -1)
+    if measure_result:
+        size = payload_size(result)
+        if size is not None:
+            registry.observe("visionvoice_stage_payload_bytes", labels + ("out",), size)
+    return result
+
+
+def instrument(service, payload=None, measure_result=True):
+    """Decorator recording a function's calls as stage '<service>.<function name>'.
+
+    payload names the argument whose size is recorded as the input
+    (default: the first parameter, False for none); measure_result=False
+    skips the output size for functions returning URLs or keys.
+    """
+    def decorator(func):
+        stage = f"{service}.{func.__name__}"
+        signature = inspect.signature(func)
+        payload_name = None if payload is False else payload or next(iter(signature.parameters), None)
+        payload_index = list(signature.parameters).index(payload_name) if payload_name else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if payload_name in kwargs:
+                payload_in = kwargs[payload_name]
+            elif payload_index is not None and payload_index < len(args):
+                payload_in = args[payload_index]
+            else:
+                payload_in = None
+            return call(stage, func, *args, payload_in=payload_in, measure_result=measure_result, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+def stage_summary():
+    """Per (stage, tier) rows for dashboards: calls, errors, in flight, mean and p95 latency, mean bytes."""
+    durations = registry.series("visionvoice_stage_duration_seconds")
+    errors = registry.series("visionvoice_stage_errors_total")
+    in_flight = registry.series("visionvoice_stage_in_flight")
+    payloads = registry.series("visionvoice_stage_payload_bytes")
+
+    rows = []
+    for (stage, tier), histogram in sorted(durations.items()):
+        row = {
+            "stage": stage,
+            "tier": tier,
+            "calls": histogram.count,
+            "errors": sum(count for (s, t, _), count in errors.items() if (s, t) == (stage, tier)),
+            "in_flight": in_flight.get((stage, tier), 0),
+            "mean_ms": round(histogram.sum / histogram.count * 1000, 1) if histogram.count else 0.0,
+            "p95_ms": histogram.quantile(0.95) * 1000,
+        }
+        for direction in ("in", "out"):
+            sizes = payloads.get((stage, tier, direction))
+            row[f"mean_bytes_{direction}"] = round(sizes.sum / sizes.count) if sizes and sizes.count else None
+        rows.append(row)
+    return rows
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host=None):
+    """Serve /metrics in Prometheus text format from a daemon thread; started once per process."""
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host or METRICS_HOST, METRICS_PORT if port is None else port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(f"Audit: Metrics endpoint started - http://{_server.server_address[0]}:"
+                        f"{_server.server_address[1]}/metrics")
+    return _server
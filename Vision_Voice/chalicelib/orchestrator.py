@@ -0,0 +1,202 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', '8'))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Stage computations in progress across all jobs, keyed by stage key
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """Raised for stages that were skipped because their job was cancelled."""
+
+
+def get_executor():
+    """Return the shared stage worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+    return _executor
+
+
+class PipelineJob:
+    """Runs the stages a set of targets needs, each as soon as its inputs are ready.
+
+    Independent stages (e.g. synthesize and pdf of the same text) run at the
+    same time on the shared pool. A stage already being computed by another
+    job for the same key is joined rather than run twice. Cancelling stops
+    stages that have not started; running stages finish and stay memoized.
+    Stage functions run off the Streamlit thread and must not call st.*.
+    """
+
+    def __init__(self, graph, source, targets, executor=None):
+        self.graph = graph
+        self.source = source
+        self.targets = tuple(targets)
+        self.executor = executor or get_executor()
+        self.stages = self._plan(self.targets)
+        self._futures = {name: Future() for name in self.stages}
+        self._waiting = {name: len(self.graph.stages[name][1]) for name in self.stages}
+        self._dependents = {name: [] for name in self.stages}
+        for name in self.stages:
+            for dep in self.graph.stages[name][1]:
+                self._dependents[dep].append(name)
+        self._timings = {}
+        self._ready_at = {}
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._started = None
+        self._finished = None
+
+    def _plan(self, targets):
+        """Return the targets and their dependencies in registration (topological) order."""
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.graph.stages[name][1])
+        return [name for name in self.graph.stages if name in needed]
+
+    def start(self):
+        """Schedule the root stages and return the job."""
+        self._started = time.perf_counter()
+        for name in self.stages:
+            if self._waiting[name] == 0:
+                self._schedule(name)
+        return self
+
+    def cancel(self):
+        """Skip every stage that has not started yet."""
+        if not self._cancel.is_set():
+            self._cancel.set()
+            logger.info(f"Audit: Pipeline job cancelled - Targets: {', '.join(self.targets)}")
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        return all(future.done() for future in self._futures.values())
+
+    def result(self, name, timeout=None):
+        """Block until a stage finishes and return its output (or raise its error)."""
+        return self._futures[name].result(timeout)
+
+    def wait(self, timeout=None):
+        """Block until every stage in the job has finished."""
+        for name in self.targets:
+            self._futures[name].exception(timeout)
+
+    def computed(self, name):
+        """Return True if this job actually ran the stage (not cached or joined)."""
+        return self._timings.get(name, {}).get("status") == "computed"
+
+    def timings(self):
+        """Return the per-stage latency breakdown in pipeline order.
+
+        Each entry has the stage name, its status (computed, cached, joined,
+        failed, skipped or cancelled), the seconds it ran and the seconds it
+        queued after its inputs were ready.
+        """
+        return [self._timings[name] for name in self.stages if name in self._timings]
+
+    def wall_seconds(self):
+        """Return the elapsed time from start until the last stage finished."""
+        if self._started is None:
+            return 0.0
+        return (self._finished or time.perf_counter()) - self._started
+
+    def _schedule(self, name):
+        self._ready_at[name] = time.perf_counter()
+        if self.cancelled:
+            self._finish(name, "cancelled", error=JobCancelled(f"Stage '{name}' cancelled"))
+            return
+        # Carry the caller's context (metrics tier) into the worker thread
+        self.executor.submit(contextvars.copy_context().run, self._run_stage, name)
+
+    def _run_stage(self, name):
+        start = time.perf_counter()
+        queued = start - self._ready_at[name]
+        if self.cancelled:
+            self._finish(name, "cancelled", queued=queued, error=JobCancelled(f"Stage '{name}' cancelled"))
+            return
+
+        deps = self.graph.stages[name][1]
+        for dep in deps:
+            error = self._futures[dep].exception()
+            if error is not None:
+                self._finish(name, "skipped", queued=queued, error=error)
+                return
+
+        inputs = [self._futures[dep].result() for dep in deps] if deps else [self.source]
+        key = self.graph.stage_key(name, self.source)
+        # Check the memo under the lock so a job that just finished is reported as cached, not computed
+        with _inflight_lock:
+            hit, value = self.graph.memo.get(key)
+            owner = None if hit else _inflight.get(key)
+            if not hit and owner is None:
+                _inflight[key] = self._futures[name]
+        if hit:
+            self.graph.last_run[name] = {"cached": True, "seconds": 0.0}
+            self._finish(name, "cached", queued=queued, value=value)
+            return
+        if owner is not None:
+            try:
+                value = owner.result()
+            except Exception as e:
+                self._finish(name, "failed", start, queued, error=e)
+            else:
+                self._finish(name, "joined", start, queued, value=value)
+            return
+
+        try:
+            value = self.graph.execute(name, self.source, inputs)
+        except Exception as e:
+            logger.error(f"Pipeline stage '{name}' failed - Error: {e}", exc_info=True)
+            self._finish(name, "failed", start, queued, error=e)
+        else:
+            self._finish(name, "computed", start, queued, value=value)
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+
+    def _finish(self, name, status, start=None, queued=0.0, value=None, error=None):
+        seconds = time.perf_counter() - start if start is not None else 0.0
+        self._timings[name] = {"stage": name, "status": status, "seconds": seconds, "queued": queued}
+        future = self._futures[name]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+        ready = []
+        with self._lock:
+            for dependent in self._dependents[name]:
+                self._waiting[dependent] -= 1
+                if self._waiting[dependent] == 0:
+                    ready.append(dependent)
+            if self.done():
+                self._finished = time.perf_counter()
+        for dependent in ready:
+            self._schedule(dependent)
+
+
+def run_pipeline(graph, source, targets, executor=None):
+    """Start a PipelineJob for the given target stages and return it."""
+    return PipelineJob(graph, source, targets, executor).start()
@@ -1,38 +1,127 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-import tempfile
+import io
 import logging
 
+from .metrics import instrument
+
 # Initialize logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def generate_pdf(text, filename="extracted_text.pdf"):
-    """Generate a PDF file from the given text."""
+FONT_NAME = "Helvetica"
+FONT_SIZE = 12
+LEADING = 14.4
+MARGIN = 40
+FOOTER_FONT_SIZE = 9
+TAB_SPACES = 4
+
+
+class LineWrapper:
+    """Greedy word wrap measured with reportlab font metrics.
+
+    Word and character widths are cached, so wrapping costs one metrics
+    lookup per distinct word and stays linear in the length of the text.
+    """
+
+    def __init__(self, max_width, font_name=FONT_NAME, font_size=FONT_SIZE):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        self.max_width = max_width
+        self._measure = lambda s: stringWidth(s, font_name, font_size)
+        self._widths = {}
+        self.space_width = self.width(" ")
+
+    def width(self, s):
+        width = self._widths.get(s)
+        if width is None:
+            width = self._widths[s] = self._measure(s)
+        return width
+
+    def _break_word(self, word):
+        """Split a word wider than the line into pieces that fit, character by character."""
+        pieces, current, current_width = [], [], 0.0
+        for char in word:
+            char_width = self.width(char)
+            if current and current_width + char_width > self.max_width:
+                pieces.append("".join(current))
+                current, current_width = [], 0.0
+            current.append(char)
+            current_width += char_width
+        pieces.append("".join(current))
+        return pieces
+
+    def wrap(self, line):
+        """Yield the pieces of one line of text that each fit within max_width."""
+        words = line.expandtabs(TAB_SPACES).split(" ")
+        current, current_width = [], 0.0
+        for word in words:
+            word_width = self.width(word)
+            if word_width > self.max_width:
+                *full, word = self._break_word(word)
+                if current:
+                    yield " ".join(current)
+                yield from full
+                current, current_width = [], 0.0
+                word_width = self.width(word)
+            if current and current_width + self.space_width + word_width > self.max_width:
+                yield " ".join(current)
+                current, current_width = [], 0.0
+            if current:
+                current_width += self.space_width
+            current.append(word)
+            current_width += word_width
+        yield " ".join(current)
+
+
+def write_pdf(text, output, title="Extracted text"):
+    """Render text as a paginated PDF into a binary file-like object; returns the page count."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    width, height = letter
+    wrapper = LineWrapper(width - 2 * MARGIN)
+    lines_per_page = int((height - 2 * MARGIN) // LEADING)
+
+    c = canvas.Canvas(output, pagesize=letter, pageCompression=1)
+    c.setTitle(title)
+    pages = 0
+    page_lines = []
+
+    def flush_page():
+        nonlocal pages
+        pages += 1
+        text_object = c.beginText(MARGIN, height - MARGIN)
+        text_object.setFont(FONT_NAME, FONT_SIZE, LEADING)
+        text_object.textLines(page_lines)
+        c.drawText(text_object)
+        c.setFont(FONT_NAME, FOOTER_FONT_SIZE)
+        c.drawCentredString(width / 2, MARGIN / 2, str(pages))
+        c.showPage()
+        page_lines.clear()
+
+    for line in text.split("\n"):
+        for wrapped in wrapper.wrap(line.rstrip("\r")):
+            page_lines.append(wrapped)
+            if len(page_lines) == lines_per_page:
+                flush_page()
+    if page_lines:
+        flush_page()
+    c.save()
+    return pages
+
+
+@instrument("pdf")
+def generate_pdf(text, title="Extracted text"):
+    """Generate a PDF from the given text and return its bytes."""
     if not text.strip():
         logger.warning("Empty input text provided to generate_pdf")
         raise ValueError("Cannot generate PDF from empty text")
 
     try:
         logger.info("Audit: Starting PDF generation")
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            c = canvas.Canvas(tmp_file.name, pagesize=letter)
-            width, height = letter
-            text_object = c.beginText(40, height - 40)
-            text_object.setFont("Helvetica", 12)
-
-            for line in text.split('\n'):
-                wrapped_lines = [line[i:i+90] for i in range(0, len(line), 90)]
-                for wrap in wrapped_lines:
-                    text_object.textLine(wrap)
-
-            c.drawText(text_object)
-            c.showPage()
-            c.save()
-
-            logger.info(f"Audit: PDF successfully generated - Path: {tmp_file.name}")
-            return tmp_file.name
+        buffer = io.BytesIO()
+        pages = write_pdf(text, buffer, title)
+        logger.info(f"Audit: PDF successfully generated - Pages: {pages}, Bytes: {buffer.tell()}")
+        return buffer.getvalue()
 
     except Exception as e:
         logger.error(f"Error during PDF generation - Error: {e}", exc_info=True)
@@ -0,0 +1,70 @@
+from collections import deque
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton that finds many phrases in a text in one pass.
+
+    Matching is exact and case-sensitive; lowercase phrases and text for
+    case-insensitive matching. Scanning costs O(len(text) + matches)
+    regardless of how many phrases were compiled.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = list(dict.fromkeys(phrase for phrase in phrases if phrase))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for index, phrase in enumerate(self.phrases):
+            self._add(phrase, index)
+        self._link()
+
+    def _add(self, phrase, index):
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = self._output[state] + (index,)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text):
+        """Yield (end_index, phrase_index) for every occurrence, including overlaps."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                yield position, index
+
+    def distinct_matches(self, text):
+        """Return the set of phrase indexes that occur in the text."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
@@ -0,0 +1,293 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+from functools import partial
+from collections import OrderedDict
+
+from . import (
+    metrics,
+    image_preprocessing,
+    s3_utils,
+    textract_utils,
+    comprehend_utils,
+    polly_utils,
+    translate_utils,
+    text_processing,
+    pdf_utils
+)
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PIPELINE_STAGES = (
+    "preprocess", "upload", "extract", "clean", "summarize", "translations", "translate", "synthesize", "pdf"
+)
+
+# AWS service each stage calls, for per-service concurrency limits
+STAGE_SERVICES = {
+    "upload": "s3",
+    "extract": "textract",
+    "summarize": "comprehend",
+    "translations": "translate",
+    "translate": "translate",
+    "synthesize": "polly",
+}
+
+
+def content_hash(data):
+    """Return the SHA-256 hex digest of the given bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+UPLOAD_PREFIX = 'uploads/'
+
+
+class SourceDocument:
+    """Uploaded document bytes plus the name they were uploaded under.
+
+    filename is only for display and file-type checks; S3 objects are keyed
+    by content (storage_key) so different uploads with the same name never
+    overwrite each other.
+    """
+
+    def __init__(self, data, filename, stats=None):
+        self.data = data
+        self.filename = filename
+        self.digest = content_hash(data)
+        self.stats = stats or {}
+
+    @property
+    def storage_key(self):
+        return f"{UPLOAD_PREFIX}{self.digest}{os.path.splitext(self.filename)[1].lower()}"
+
+
+class StageMemo:
+    """Thread-safe bounded LRU store for stage outputs."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        """Return (hit, value) for the given stage key."""
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+
+    def put(self, key, value):
+        """Store a stage output, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class StageGraph:
+    """Graph of pipeline stages whose outputs are memoized by stage key.
+
+    A stage key hashes the stage name, its parameters and the keys of the
+    stages it depends on (or the source digest for root stages), so changing
+    one stage's parameters only re-runs that stage and the ones after it.
+    """
+
+    def __init__(self, memo=None):
+        self.memo = memo if memo is not None else StageMemo()
+        self.stages = OrderedDict()
+        self.params = {}
+        self.last_run = {}
+
+    def add_stage(self, name, func, deps=(), lazy_deps=()):
+        """Register a stage; root stages receive the SourceDocument as input.
+
+        Each lazy dependency is passed after the regular inputs as a
+        zero-argument callable that runs it on demand; lazy dependencies do
+        not contribute to the stage key.
+        """
+        for dep in tuple(deps) + tuple(lazy_deps):
+            if dep not in self.stages:
+                raise ValueError(f"Unknown dependency '{dep}' for stage '{name}'")
+        self.stages[name] = (func, tuple(deps), tuple(lazy_deps))
+        self.params.setdefault(name, {})
+
+    def set_params(self, name, **params):
+        """Set the parameters a stage is called with and keyed on."""
+        if name not in self.stages:
+            raise KeyError(f"Unknown stage: {name}")
+        self.params[name] = params
+
+    def stage_key(self, name, source):
+        """Compute the memo key for a stage given the source document."""
+        _, deps, _ = self.stages[name]
+        upstream = [self.stage_key(dep, source) for dep in deps] if deps else [source.digest]
+        payload = json.dumps([name, self.params[name], upstream], sort_keys=True, default=str)
+        return content_hash(payload.encode("utf-8"))
+
+    def is_cached(self, name, source):
+        """Return True if the stage output is already memoized."""
+        return self.stage_key(name, source) in self.memo
+
+    def computed(self, name):
+        """Return True if the last run of a stage actually executed it."""
+        return self.last_run.get(name, {}).get("cached") is False
+
+    def run(self, name, source):
+        """Return the stage output, running it and its dependencies on a miss."""
+        _, deps, _ = self.stages[name]
+        key = self.stage_key(name, source)
+        hit, value = self.memo.get(key)
+        if hit:
+            self.last_run[name] = {"cached": True, "seconds": 0.0}
+            return value
+
+        inputs = [self.run(dep, source) for dep in deps] if deps else [source]
+        return self._compute(name, source, key, inputs)
+
+    def execute(self, name, source, inputs, **callbacks):
+        """Return the stage output given its already computed dependency outputs.
+
+        Used by schedulers that run dependencies themselves; the output is
+        still memoized and recorded in last_run. Keyword arguments such as
+        progress callbacks are passed to the stage on a miss but are not
+        part of its key.
+        """
+        key = self.stage_key(name, source)
+        hit, value = self.memo.get(key)
+        if hit:
+            self.last_run[name] = {"cached": True, "seconds": 0.0}
+            return value
+        return self._compute(name, source, key, list(inputs), callbacks)
+
+    def _compute(self, name, source, key, inputs, callbacks=None):
+        func, _, lazy_deps = self.stages[name]
+        inputs += [partial(self.run, dep, source) for dep in lazy_deps]
+        logger.info(f"Audit: Running pipeline stage '{name}' - Key: {key[:12]}")
+        start = time.perf_counter()
+        value = metrics.call(f"pipeline.{name}", func, *inputs, payload_in=inputs[0] if inputs else None,
+                             **self.params[name], **(callbacks or {}))
+        elapsed = time.perf_counter() - start
+        self.memo.put(key, value)
+        self.last_run[name] = {"cached": False, "seconds": elapsed}
+        return value
+
+
+def preprocess_stage(source, enabled=True):
+    """Shrink single images for OCR; other documents pass through unchanged."""
+    if not enabled or not image_preprocessing.should_preprocess(source.filename):
+        return source
+    data, stats = image_preprocessing.preprocess_image(source.data)
+    if data is source.data:
+        return SourceDocument(data, source.filename, stats)
+    return SourceDocument(data, os.path.splitext(source.filename)[0] + ".jpg", stats)
+
+
+def upload_stage(source):
+    """Upload the source bytes to S3 under their content key and return the key."""
+    s3_utils.upload_bytes(source.data, source.storage_key)
+    return source.storage_key
+
+
+def extract_stage(document, upload, profile=textract_utils.DEFAULT_PROFILE):
+    """Extract text, uploading to S3 only when the result cache misses.
+
+    Small single images are sent to Textract inline while the S3 copy is
+    archived in the background; larger inputs and multi-page documents are
+    uploaded first and read by Textract from S3.
+    """
+    # Content seen before (any session) skips both the S3 upload and Textract
+    cached = textract_utils.lookup_cached_text(document.data, profile)
+    if cached is not None:
+        return cached
+    if textract_utils.can_send_bytes(document.filename, document.data):
+        s3_utils.archive_in_background(upload)
+        return textract_utils.extract_text_from_image(
+            document.storage_key, image_bytes=document.data, profile=profile, send_bytes=True
+        )
+    s3_filename = upload()
+    if textract_utils.is_multipage_document(document.filename):
+        return textract_utils.extract_text_from_document(s3_filename, image_bytes=document.data, profile=profile)
+    return textract_utils.extract_text_from_image(s3_filename, image_bytes=document.data, profile=profile)
+
+
+def summarize_stage(text, enabled=False, backend=None):
+    """Summarize the text when enabled, otherwise pass it through.
+
+    backend is 'comprehend', 'local' or 'auto'; None uses SUMMARY_BACKEND.
+    """
+    if enabled:
+        return comprehend_utils.summarize_text(text, backend=backend)
+    return text
+
+
+def translations_stage(text, target_languages=()):
+    """Translate the text into every requested language; returns (text, {language: translation})."""
+    if target_languages:
+        return text, translate_utils.translate_to_languages(text, target_languages)
+    return text, {}
+
+
+def translate_stage(translations, target_language=None):
+    """Pick the text for speech and PDF: the target language's translation, or the original."""
+    text, translated = translations
+    if not target_language:
+        return text
+    if target_language in translated:
+        return translated[target_language]
+    return translate_utils.translate_text(text, target_language)
+
+
+def pdf_stage(text):
+    """Render the text to PDF and return the file contents."""
+    return pdf_utils.generate_pdf(text)
+
+
+def limit_service_concurrency(graph, limits):
+    """Cap concurrent calls per AWS service across every run of the graph.
+
+    limits maps a service name from STAGE_SERVICES to the number of stages
+    calling it that may run at once; services without a limit are unbounded.
+    """
+    semaphores = {service: threading.BoundedSemaphore(limit) for service, limit in limits.items()}
+    for name, (func, deps, lazy_deps) in list(graph.stages.items()):
+        semaphore = semaphores.get(STAGE_SERVICES.get(name))
+        if semaphore is not None:
+            graph.stages[name] = (_limited(func, semaphore), deps, lazy_deps)
+    return graph
+
+
+def _limited(func, semaphore):
+    def run_limited(*args, **kwargs):
+        with semaphore:
+            return func(*args, **kwargs)
+    return run_limited
+
+
+def build_document_pipeline(memo=None):
+    """Build the preprocess → upload/extract → clean → summarize → translations → translate → synthesize/pdf graph."""
+    graph = StageGraph(memo)
+    graph.add_stage("preprocess", preprocess_stage)
+    graph.add_stage("upload", upload_stage, deps=("preprocess",))
+    graph.add_stage("extract", extract_stage, deps=("preprocess",), lazy_deps=("upload",))
+    graph.add_stage("clean", text_processing.clean_and_format_sentences, deps=("extract",))
+    graph.add_stage("summarize", summarize_stage, deps=("clean",))
+    graph.add_stage("translations", translations_stage, deps=("summarize",))
+    graph.add_stage("translate", translate_stage, deps=("translations",))
+    # Memoizes where the audio is stored; callers turn it into a fresh URL with audio_location_url
+    graph.add_stage("synthesize", polly_utils.synthesize_audio, deps=("translate",))
+    graph.add_stage("pdf", pdf_stage, deps=("translate",))
+    return graph
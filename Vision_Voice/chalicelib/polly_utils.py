@@ -1,22 +1,105 @@
 import os
-import tempfile
+import re
+import time
+import hashlib
 import logging
-import boto3
+import threading
+import contextvars
+import tracemalloc
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import BotoCoreError, ClientError
-from .s3_utils import upload_to_s3, generate_presigned_url
+from .aws_clients import get_client
+from .s3_utils import MultipartWriter, generate_presigned_url
+from .cache_store import DiskCache, cache_path
+from .metrics import instrument
 import xml.sax.saxutils as xml_utils
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# AWS clients
-s3 = boto3.client('s3')
-polly = boto3.client('polly')
-
 # Bucket name
 bucket_name = 'visionvoicegroupproject'  # Should match your bucket name
 
+# Where audio goes: "s3" (content-addressed objects), "local" (files in the cache dir)
+# or "none" (no archival; the audio bytes are returned directly)
+AUDIO_CACHE_STORAGE = os.getenv('AUDIO_CACHE_STORAGE', 's3').lower()
+PRESIGNED_URL_EXPIRATION = 3600
+PRESIGNED_URL_REFRESH_MARGIN = 300
+
+# Polly voices available with the standard engine
+VOICES = frozenset((
+    "Aditi", "Amy", "Astrid", "Bianca", "Brian", "Camila", "Carla", "Carmen", "Celine", "Chantal",
+    "Conchita", "Cristiano", "Dora", "Emma", "Enrique", "Ewa", "Filiz", "Gabrielle", "Geraint", "Giorgio",
+    "Gwyneth", "Hans", "Ines", "Ivy", "Jacek", "Jan", "Joanna", "Joey", "Justin", "Karl", "Kendra",
+    "Kevin", "Kimberly", "Lea", "Liv", "Lotte", "Lucia", "Lupe", "Mads", "Maja", "Marlene", "Mathieu",
+    "Matthew", "Maxim", "Mia", "Miguel", "Mizuki", "Naja", "Nicole", "Penelope", "Raveena", "Ricardo",
+    "Ruben", "Russell", "Salli", "Seoyeon", "Takumi", "Tatyana", "Vicki", "Vitoria", "Zeina", "Zhiyu",
+))
+
+# SynthesizeSpeech limits: billed characters (text outside tags) and total SSML length
+MAX_BILLED_CHARS = 3000
+MAX_SSML_CHARS = 6000
+SYNTHESIS_WORKERS = int(os.getenv('POLLY_SYNTHESIS_WORKERS', '4'))
+# Formats whose chunks can be joined byte-for-byte (MP3 frames, raw PCM samples)
+CONCATENABLE_FORMATS = ('mp3', 'pcm')
+AUDIO_CONTENT_TYPES = {'mp3': 'audio/mpeg', 'ogg_vorbis': 'audio/ogg', 'pcm': 'audio/pcm'}
+# Bytes read from the Polly stream at a time
+STREAM_READ_SIZE = 64 * 1024
+
+_audio_cache = None
+_presigned_urls = {}
+_presigned_lock = threading.Lock()
+_synthesis_executor = None
+_synthesis_lock = threading.Lock()
+_synthesis_stats = deque(maxlen=100)
+
+def get_audio_cache():
+    """Return the persistent audio cache index, creating it on first use."""
+    global _audio_cache
+    if _audio_cache is None:
+        _audio_cache = DiskCache(cache_path("audio_cache.db"), max_bytes=16 * 1024 * 1024)
+    return _audio_cache
+
+def audio_cache_key(ssml_text, voice_id, output_format):
+    """Hash the SSML document, voice and output format into a cache key."""
+    payload = f"{voice_id}\0{output_format}\0{ssml_text}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+def get_presigned_url(s3_filename):
+    """Return a cached pre-signed URL, generating a new one shortly before expiry."""
+    now = time.time()
+    with _presigned_lock:
+        cached = _presigned_urls.get(s3_filename)
+        if cached and cached[1] - PRESIGNED_URL_REFRESH_MARGIN > now:
+            return cached[0]
+    url = generate_presigned_url(s3_filename, expiration=PRESIGNED_URL_EXPIRATION)
+    with _presigned_lock:
+        _presigned_urls[s3_filename] = (url, now + PRESIGNED_URL_EXPIRATION)
+    return url
+
+def _cached_audio(key):
+    """Return the stored location of cached audio, or None if it is gone."""
+    entry = get_audio_cache().get(key)
+    if not entry:
+        return None
+    if "path" in entry and not os.path.exists(entry["path"]):
+        return None
+    return entry
+
+def audio_location_url(location):
+    """Return something playable for a synthesize_audio result: a current pre-signed URL, a local path or the bytes.
+
+    Call this whenever the audio is shown or written out rather than keeping
+    the URL, which expires after PRESIGNED_URL_EXPIRATION seconds.
+    """
+    if isinstance(location, (bytes, bytearray)):
+        return location
+    if "path" in location:
+        return location["path"]
+    return get_presigned_url(location["s3_key"])
+
 def format_text_for_ssml(text):
     """Wraps text in SSML with special formatting for bullet points and natural pauses."""
     import re
@@ -42,37 +125,236 @@ def format_text_for_ssml(text):
 
 
 
-def text_to_speech(text, s3_filename='speech.mp3'):
-    """Convert input text to speech, upload to S3, and return a pre-signed URL."""
+def _billed_length(ssml):
+    """Count the characters Polly bills for: text outside tags, unescaped."""
+    return len(xml_utils.unescape(re.sub(r'<[^>]+>', '', ssml)))
+
+def _fit_elements(elements, max_billed, max_chars):
+    """Yield SSML elements, splitting any single <p>/<s> over the limits at word boundaries."""
+    for element in elements:
+        match = re.match(r'^(<(p|s)>(?:<break[^>]*/>)?)(.*)(</\2>)$', element)
+        if not match or (_billed_length(element) <= max_billed and len(element) <= max_chars):
+            yield element
+            continue
+        opening, tag, content, closing = match.groups()
+        piece = []
+        for word in content.split(' '):
+            candidate = opening + ' '.join(piece + [word]) + closing
+            if piece and (_billed_length(candidate) > max_billed or len(candidate) > max_chars):
+                yield opening + ' '.join(piece) + closing
+                opening, piece = f"<{tag}>", []
+            piece.append(word)
+        if piece:
+            yield opening + ' '.join(piece) + closing
+
+def split_ssml(ssml_text, max_billed=MAX_BILLED_CHARS, max_chars=MAX_SSML_CHARS):
+    """Split SSML from format_text_for_ssml into <speak> documents within Polly's limits.
+
+    Chunks break between sentences and paragraphs; only a single sentence
+    longer than the limit is split mid-sentence, at a word boundary.
+    """
+    body_limit = max_chars - len("<speak>\n\n</speak>")
+    elements = [line for line in ssml_text.splitlines() if line.strip() and line not in ('<speak>', '</speak>')]
+    chunks = []
+    # The newlines around elements are text outside tags, so each element bills one extra character
+    current, billed, size = [], 1, 0
+    for element in _fit_elements(elements, max_billed - 2, body_limit):
+        element_billed = _billed_length(element) + 1
+        if current and (billed + element_billed > max_billed or size + len(element) + 1 > body_limit):
+            chunks.append(current)
+            current, billed, size = [], 1, 0
+        current.append(element)
+        billed += element_billed
+        size += len(element) + 1
+    if current:
+        chunks.append(current)
+    return ["<speak>\n" + "\n".join(chunk) + "\n</speak>" for chunk in chunks] or [ssml_text]
+
+def _get_synthesis_executor():
+    global _synthesis_executor
+    if _synthesis_executor is None:
+        with _synthesis_lock:
+            if _synthesis_executor is None:
+                _synthesis_executor = ThreadPoolExecutor(max_workers=SYNTHESIS_WORKERS, thread_name_prefix="polly")
+    return _synthesis_executor
+
+def _synthesize_chunk(ssml_text, voice_id, output_format):
+    """Start synthesis of one SSML document and return its unread audio stream."""
+    response = get_client('polly').synthesize_speech(
+        Text=ssml_text,
+        TextType='ssml',
+        OutputFormat=output_format,
+        VoiceId=voice_id
+    )
+    if "AudioStream" not in response:
+        logger.error("Polly did not return an AudioStream")
+        raise RuntimeError("Polly did not return an audio stream")
+    return response['AudioStream']
+
+class _MemorySink:
+    """Collects audio bytes when there is nowhere to archive them."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.peak_buffer = 0
+
+    def write(self, data):
+        self._buffer += data
+        self.peak_buffer = len(self._buffer)
+
+    def close(self):
+        return bytes(self._buffer)
+
+    def abort(self):
+        self._buffer = bytearray()
+
+class _FileSink:
+    """Streams audio into a file, renamed into place once complete."""
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp_path = path + ".part"
+        self._file = open(self._tmp_path, 'wb')
+        self.peak_buffer = 0
+
+    def write(self, data):
+        self._file.write(data)
+        self.peak_buffer = max(self.peak_buffer, len(data))
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp_path)
+
+def stream_ssml(ssml_text, sink, voice_id='Joanna', output_format='mp3', on_chunk=None):
+    """Synthesize SSML of any length into a sink; return (sink location, stats).
+
+    The document is split into chunks within Polly's limits, which are
+    requested in parallel; their audio streams are copied into the sink in
+    order, STREAM_READ_SIZE bytes at a time, so no whole clip is held in
+    memory. on_chunk(index, count, audio) is called in the caller's thread
+    as each chunk becomes available in order, so the first part can start
+    playing while the rest is synthesized; it needs each chunk's bytes, so
+    one chunk at a time is buffered when it is set.
+    """
+    start = time.perf_counter()
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    chunks = split_ssml(ssml_text) if output_format in CONCATENABLE_FORMATS else [ssml_text]
+    executor = _get_synthesis_executor()
+    # Each chunk runs in a copy of the caller's context so its AWS calls keep the trace ID
+    futures = [
+        executor.submit(contextvars.copy_context().run, _synthesize_chunk, chunk, voice_id, output_format)
+        for chunk in chunks
+    ]
+    total = 0
+    peak_chunk = 0
+    try:
+        for index, future in enumerate(futures):
+            stream = future.result()
+            try:
+                if on_chunk is not None:
+                    audio = stream.read()
+                    peak_chunk = max(peak_chunk, len(audio))
+                    sink.write(audio)
+                    total += len(audio)
+                    on_chunk(index, len(futures), audio)
+                    continue
+                for block in iter(lambda: stream.read(STREAM_READ_SIZE), b''):
+                    sink.write(block)
+                    total += len(block)
+            finally:
+                stream.close()
+        location = sink.close()
+    except Exception:
+        for future in futures:
+            if not future.cancel() and future.done() and future.exception() is None:
+                future.result().close()
+        sink.abort()
+        raise
+
+    stats = {
+        "location": location if isinstance(location, str) else None,
+        "chunks": len(chunks),
+        "bytes": total,
+        "billed_chars": _billed_length(ssml_text),
+        # Largest audio buffer we held: the sink's buffer plus any materialized chunk
+        "peak_buffer_bytes": max(sink.peak_buffer, peak_chunk, min(total, STREAM_READ_SIZE)),
+        "seconds": time.perf_counter() - start,
+    }
+    if tracemalloc.is_tracing():
+        stats["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+    _synthesis_stats.append(stats)
+    logger.info(
+        f"Audit: Synthesized {len(chunks)} chunk(s) - Bytes: {total}, Billed characters: {stats['billed_chars']}, "
+        f"Peak buffer: {stats['peak_buffer_bytes'] / 1024:.0f} KiB"
+    )
+    return location, stats
+
+@instrument("polly")
+def synthesize_ssml(ssml_text, voice_id='Joanna', output_format='mp3', on_chunk=None):
+    """Synthesize SSML of any length and return the audio bytes."""
+    audio, _ = stream_ssml(ssml_text, _MemorySink(), voice_id, output_format, on_chunk)
+    return audio
+
+def get_synthesis_stats():
+    """Return stats for recent syntheses, oldest first: chunks, bytes, peak buffer and seconds."""
+    return list(_synthesis_stats)
+
+def text_to_speech(text, s3_filename=None, voice_id='Joanna', output_format='mp3', on_chunk=None):
+    """Convert input text to speech and return a pre-signed URL (or local path) for the audio."""
+    return audio_location_url(synthesize_audio(text, s3_filename, voice_id, output_format, on_chunk))
+
+@instrument("polly", measure_result=False)
+def synthesize_audio(text, s3_filename=None, voice_id='Joanna', output_format='mp3', on_chunk=None):
+    """Convert input text to speech and return where the audio is stored: {"s3_key": ...} or {"path": ...}.
+
+    Audio is cached by SSML, voice and format; a cache hit skips Polly and
+    the S3 upload. Without an explicit s3_filename the object key is
+    content-addressed so identical requests share one object. Long texts
+    are synthesized in parallel chunks and streamed straight into S3 (or
+    the local cache file); see stream_ssml for on_chunk. With
+    AUDIO_CACHE_STORAGE=none nothing is archived and the audio bytes are
+    returned instead.
+    """
     if not text.strip():
         logger.warning("Attempted text-to-speech with empty input")
         raise ValueError("Empty text cannot be converted to speech")
     
     try:
-        logger.info(f"Audit: Text-to-speech synthesis started - Filename: {s3_filename}")
         ssml_text = format_text_for_ssml(text)
+        key = audio_cache_key(ssml_text, voice_id, output_format)
+        s3_filename = s3_filename or f"audio/{key}.{output_format}"
+
+        if AUDIO_CACHE_STORAGE == 'none':
+            logger.info("Audit: Text-to-speech synthesis started - No archival")
+            return synthesize_ssml(ssml_text, voice_id, output_format, on_chunk)
+
+        cached = _cached_audio(key)
+        if cached:
+            logger.info(f"Audit: Audio cache hit - Key: {key[:12]}")
+            return cached
+
+        logger.info(f"Audit: Text-to-speech synthesis started - Filename: {s3_filename}")
+        if AUDIO_CACHE_STORAGE == 'local':
+            local_path = os.path.join(os.path.dirname(cache_path("audio_cache.db")), f"{key}.{output_format}")
+            stream_ssml(ssml_text, _FileSink(local_path), voice_id, output_format, on_chunk)
+            location = {"path": local_path}
+            get_audio_cache().set(key, location)
+            logger.info(f"Audit: Speech synthesis successful - Path: {local_path}")
+            return location
+
+        writer = MultipartWriter(s3_filename, content_type=AUDIO_CONTENT_TYPES.get(output_format))
+        stream_ssml(ssml_text, writer, voice_id, output_format, on_chunk)
+        location = {"s3_key": s3_filename}
+        get_audio_cache().set(key, location)
 
-        response = polly.synthesize_speech(
-            Text=ssml_text,
-            TextType='ssml',
-            OutputFormat='mp3',
-            VoiceId='Joanna'
-        )
-
-        if "AudioStream" in response:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as f:
-                f.write(response['AudioStream'].read())
-                f.flush()
-                local_path = f.name
-
-            upload_to_s3(local_path, s3_filename)
-            os.remove(local_path)
-
-            logger.info(f"Audit: Speech synthesis and S3 upload successful - Filename: {s3_filename}")
-            return generate_presigned_url(s3_filename)
-        else:
-            logger.error("Polly did not return an AudioStream")
-            raise RuntimeError("Polly did not return an audio stream")
+        logger.info(f"Audit: Speech synthesis and S3 upload successful - Filename: {s3_filename}")
+        return location
 
     except (BotoCoreError, ClientError) as e:
         logger.error(f"Polly or S3 client error - Error: {e}", exc_info=True)
@@ -0,0 +1,286 @@
+import os
+import math
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from contextlib import contextmanager
+
+from .cache_store import MemoryCache, cache_path
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def current_window(now=None):
+    """Return the calendar-month quota window (e.g. '2025-04') for a timestamp.
+
+    Calendar months keep each user's usage in one row, so check-and-increment
+    stays a single conditional write on every backend.
+    """
+    now = now or datetime.now(timezone.utc)
+    return now.strftime("%Y-%m")
+
+
+def _is_unlimited(limit):
+    return limit is None or math.isinf(limit)
+
+
+class QuotaBackend:
+    """Durable per-user, per-window usage counters."""
+
+    def get_usage(self, user_id, window):
+        """Return the recorded usage for a user in a window."""
+        raise NotImplementedError
+
+    def check_and_increment(self, user_id, window, limit, amount=1):
+        """Atomically add amount if it keeps usage within limit; return (allowed, usage)."""
+        raise NotImplementedError
+
+    def add_usage(self, increments):
+        """Apply a batch of {(user_id, window): amount} increments unconditionally."""
+        raise NotImplementedError
+
+    def reset(self, user_id, window):
+        """Clear a user's usage for a window."""
+        raise NotImplementedError
+
+
+class SQLiteQuotaBackend(QuotaBackend):
+    """Quota counters in a local SQLite database."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                "user_id TEXT NOT NULL, quota_window TEXT NOT NULL, count INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (user_id, quota_window))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_usage(self, user_id, window):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT count FROM usage WHERE user_id = ? AND quota_window = ?", (user_id, window)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def check_and_increment(self, user_id, window, limit, amount=1):
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO usage (user_id, quota_window, count) VALUES (?, ?, 0)", (user_id, window))
+            if _is_unlimited(limit):
+                cursor = conn.execute(
+                    "UPDATE usage SET count = count + ? WHERE user_id = ? AND quota_window = ?",
+                    (amount, user_id, window)
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE usage SET count = count + ? WHERE user_id = ? AND quota_window = ? AND count + ? <= ?",
+                    (amount, user_id, window, amount, int(limit))
+                )
+            allowed = cursor.rowcount == 1
+            usage = conn.execute(
+                "SELECT count FROM usage WHERE user_id = ? AND quota_window = ?", (user_id, window)
+            ).fetchone()[0]
+        return allowed, usage
+
+    def add_usage(self, increments):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO usage (user_id, quota_window, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id, quota_window) DO UPDATE SET count = count + excluded.count",
+                [(user_id, window, amount) for (user_id, window), amount in increments.items()]
+            )
+
+    def reset(self, user_id, window):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM usage WHERE user_id = ? AND quota_window = ?", (user_id, window))
+
+
+class DynamoQuotaBackend(QuotaBackend):
+    """Quota counters in a DynamoDB table keyed by (user_id, quota_window).
+
+    Point endpoint_url at DynamoDB Local (or any compatible stand-in) for
+    development and tests.
+    """
+
+    def __init__(self, table_name, region=None, endpoint_url=None):
+        self.table_name = table_name
+        self.region = region
+        self.endpoint_url = endpoint_url
+
+    @property
+    def client(self):
+        from .aws_clients import get_client
+        return get_client('dynamodb', region=self.region, endpoint_url=self.endpoint_url)
+
+    @staticmethod
+    def _key(user_id, window):
+        return {"user_id": {"S": user_id}, "quota_window": {"S": window}}
+
+    def get_usage(self, user_id, window):
+        response = self.client.get_item(
+            TableName=self.table_name,
+            Key=self._key(user_id, window),
+            ConsistentRead=True
+        )
+        return int(response.get("Item", {}).get("upload_count", {}).get("N", 0))
+
+    def check_and_increment(self, user_id, window, limit, amount=1):
+        from botocore.exceptions import ClientError
+
+        params = {
+            "TableName": self.table_name,
+            "Key": self._key(user_id, window),
+            "UpdateExpression": "ADD #c :n",
+            "ExpressionAttributeNames": {"#c": "upload_count"},
+            "ExpressionAttributeValues": {":n": {"N": str(amount)}},
+            "ReturnValues": "UPDATED_NEW",
+        }
+        if not _is_unlimited(limit):
+            params["ConditionExpression"] = "attribute_not_exists(#c) OR #c <= :max"
+            params["ExpressionAttributeValues"][":max"] = {"N": str(int(limit) - amount)}
+        try:
+            response = self.client.update_item(**params)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                return False, self.get_usage(user_id, window)
+            raise
+        return True, int(response["Attributes"]["upload_count"]["N"])
+
+    def add_usage(self, increments):
+        for (user_id, window), amount in increments.items():
+            self.client.update_item(
+                TableName=self.table_name,
+                Key=self._key(user_id, window),
+                UpdateExpression="ADD #c :n",
+                ExpressionAttributeNames={"#c": "upload_count"},
+                ExpressionAttributeValues={":n": {"N": str(amount)}}
+            )
+
+    def reset(self, user_id, window):
+        self.client.delete_item(TableName=self.table_name, Key=self._key(user_id, window))
+
+
+class QuotaTracker:
+    """Front for a QuotaBackend that makes quota checks cheap.
+
+    Usage is read once and cached for usage_ttl seconds, so a check on every
+    Streamlit rerun is a dictionary lookup. In strict mode each increment is
+    an atomic check-and-increment on the backend; with write_behind the
+    increments are applied locally and flushed in batches every
+    flush_interval seconds or max_pending increments, trading cross-replica
+    strictness for fewer backend writes.
+    """
+
+    def __init__(self, backend, write_behind=False, usage_ttl=60, flush_interval=5.0, max_pending=20):
+        self.backend = backend
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._usage = MemoryCache(max_entries=10000, ttl=usage_ttl)
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        if write_behind:
+            atexit.register(self.flush)
+
+    def _cached_usage(self, key):
+        """Usage for key including unflushed increments; the caller holds self._lock."""
+        cached = self._usage.get(key)
+        if cached is None:
+            cached = self.backend.get_usage(*key) + self._pending.get(key, 0)
+            self._usage.set(key, cached)
+        return cached
+
+    def usage(self, user_id, window=None):
+        """Return the user's usage in the window, including unflushed increments."""
+        with self._lock:
+            return self._cached_usage((user_id, window or current_window()))
+
+    def try_consume(self, user_id, limit, amount=1, window=None):
+        """Record usage if it stays within limit; return (allowed, usage)."""
+        key = (user_id, window or current_window())
+        if not self.write_behind:
+            allowed, usage = self.backend.check_and_increment(key[0], key[1], limit, amount)
+            self._usage.set(key, usage)
+            return allowed, usage
+
+        # Read, check and record under one lock so concurrent reruns cannot both pass the limit
+        with self._lock:
+            usage = self._cached_usage(key)
+            if not _is_unlimited(limit) and usage + amount > limit:
+                return False, usage
+            usage += amount
+            self._pending[key] = self._pending.get(key, 0) + amount
+            self._usage.set(key, usage)
+            due = (len(self._pending) >= self.max_pending
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+        return True, usage
+
+    def refund(self, user_id, amount=1, window=None):
+        """Give back usage reserved with try_consume (e.g. the work failed or cost nothing); return usage."""
+        key = (user_id, window or current_window())
+        if not self.write_behind:
+            self.backend.add_usage({key: -amount})
+        with self._lock:
+            if self.write_behind:
+                self._pending[key] = self._pending.get(key, 0) - amount
+            cached = self._usage.get(key)
+            if cached is not None:
+                self._usage.set(key, max(cached - amount, 0))
+            return self._cached_usage(key)
+
+    def flush(self):
+        """Write pending increments to the backend in one batch.
+
+        The write happens under the lock so a usage read never sees the
+        increments in neither the backend nor the pending batch.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            if not pending:
+                return
+            try:
+                self.backend.add_usage(pending)
+                logger.info(f"Audit: Quota increments flushed - Entries: {len(pending)}")
+            except Exception as e:
+                logger.error(f"Quota flush failed, requeueing - Error: {e}", exc_info=True)
+                for key, amount in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + amount
+
+    def reset(self, user_id, window=None):
+        """Clear a user's usage for the window."""
+        key = (user_id, window or current_window())
+        with self._lock:
+            self._pending.pop(key, None)
+        self.backend.reset(*key)
+        self._usage.delete(key)
+
+
+def create_quota_backend():
+    """Build the backend selected by QUOTA_BACKEND ('sqlite' or 'dynamodb')."""
+    backend = os.getenv('QUOTA_BACKEND', 'sqlite').lower()
+    if backend == 'dynamodb':
+        return DynamoQuotaBackend(
+            os.getenv('QUOTA_TABLE', 'visionvoice-upload-quota'),
+            region=os.getenv('AWS_REGION'),
+            endpoint_url=os.getenv('QUOTA_DYNAMODB_ENDPOINT')
+        )
+    return SQLiteQuotaBackend(os.getenv('QUOTA_DB_PATH') or cache_path("quota.db"))
@@ -1,25 +1,33 @@
-import boto3
+import io
 import os
 import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
 from botocore.exceptions import ClientError
+from .aws_clients import get_client
+from .metrics import instrument
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# Setup S3 client
-s3 = boto3.client('s3')
 bucket_name = os.getenv('S3_BUCKET', 'visionvoicegroupproject')
 
+# Background uploads that keep S3 archival off the user-visible path
+ARCHIVE_WORKERS = int(os.getenv('S3_ARCHIVE_WORKERS', '4'))
+_archive_executor = None
+_archive_lock = threading.Lock()
+_archive_pending = set()
+
+# S3's minimum size for every multipart part except the last
+MULTIPART_PART_SIZE = 5 * 1024 * 1024
+
+@instrument("s3", payload=False, measure_result=False)
 def upload_to_s3(file_path, s3_filename):
-    """Upload a file to an S3 bucket with explicit credentials and logging"""
+    """Upload a file to an S3 bucket using the shared client, with logging"""
     try:
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION", "us-east-1")
-        )
+        s3 = get_client('s3', region=os.getenv("AWS_REGION", "us-east-1"))
 
         bucket_name = os.getenv("S3_BUCKET_NAME", "visionvoicegroupproject")
         
@@ -38,11 +46,127 @@ def upload_to_s3(file_path, s3_filename):
         logger.error(f"General Upload Error - File: {file_path}, Error: {e}", exc_info=True)
         raise RuntimeError("Unexpected error during S3 upload") from e
 
+@instrument("s3", measure_result=False)
+def upload_bytes(data, s3_filename):
+    """Upload in-memory bytes to the S3 bucket without a temp file"""
+    try:
+        s3 = get_client('s3', region=os.getenv("AWS_REGION", "us-east-1"))
+
+        bucket_name = os.getenv("S3_BUCKET_NAME", "visionvoicegroupproject")
+
+        logger.info(f"Audit: Upload started - Bytes: {len(data)}, S3 Key: {s3_filename}, Bucket: {bucket_name}")
+        s3.upload_fileobj(io.BytesIO(data), bucket_name, s3_filename)
+        logger.info(f"Audit: Upload successful - S3 Key: {s3_filename}")
+        return True
+
+    except ClientError as e:
+        logger.error(f"S3 Upload Error - S3 Key: {s3_filename}, Error: {e}", exc_info=True)
+        raise RuntimeError("Failed to upload file to S3") from e
+    except Exception as e:
+        logger.error(f"General Upload Error - S3 Key: {s3_filename}, Error: {e}", exc_info=True)
+        raise RuntimeError("Unexpected error during S3 upload") from e
+
+class MultipartWriter:
+    """Write-only stream into an S3 object, uploaded in fixed-size multipart parts.
+
+    At most one part is buffered in memory; peak_buffer records the largest
+    buffer held. Objects that end up smaller than one part are stored with
+    a single PutObject. Call close() to finish the object or abort() to
+    discard it.
+    """
+
+    def __init__(self, s3_filename, part_size=MULTIPART_PART_SIZE, content_type=None):
+        self.s3 = get_client('s3', region=os.getenv("AWS_REGION", "us-east-1"))
+        self.bucket_name = os.getenv("S3_BUCKET_NAME", "visionvoicegroupproject")
+        self.s3_filename = s3_filename
+        self.part_size = part_size
+        self.extra_args = {"ContentType": content_type} if content_type else {}
+        self.bytes_written = 0
+        self.peak_buffer = 0
+        self._buffer = bytearray()
+        self._parts = []
+        self._upload_id = None
+
+    def write(self, data):
+        self._buffer += data
+        self.bytes_written += len(data)
+        self.peak_buffer = max(self.peak_buffer, len(self._buffer))
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(memoryview(self._buffer)[:self.part_size]))
+            del self._buffer[:self.part_size]
+
+    def _upload_part(self, body):
+        if self._upload_id is None:
+            response = self.s3.create_multipart_upload(Bucket=self.bucket_name, Key=self.s3_filename, **self.extra_args)
+            self._upload_id = response["UploadId"]
+        part_number = len(self._parts) + 1
+        response = self.s3.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.s3_filename,
+            PartNumber=part_number,
+            UploadId=self._upload_id,
+            Body=body
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+    def close(self):
+        """Upload what is buffered and complete the object; returns the S3 key"""
+        if self._upload_id is None:
+            self.s3.put_object(Bucket=self.bucket_name, Key=self.s3_filename, Body=bytes(self._buffer), **self.extra_args)
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.s3_filename,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts}
+            )
+        self._buffer = bytearray()
+        logger.info(f"Audit: Streamed upload successful - S3 Key: {self.s3_filename}, Bytes: {self.bytes_written}, Parts: {max(1, len(self._parts))}")
+        return self.s3_filename
+
+    def abort(self):
+        """Discard the upload and any parts already sent"""
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            try:
+                self.s3.abort_multipart_upload(Bucket=self.bucket_name, Key=self.s3_filename, UploadId=self._upload_id)
+            except ClientError as e:
+                logger.error(f"Failed to abort multipart upload - S3 Key: {self.s3_filename}, Error: {e}")
+
+def _log_archive_failure(future):
+    with _archive_lock:
+        _archive_pending.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Background S3 archival failed - Error: {future.exception()}")
+
+def archive_in_background(func, *args):
+    """Run an upload on the shared archival pool and return its Future"""
+    global _archive_executor
+    if _archive_executor is None:
+        with _archive_lock:
+            if _archive_executor is None:
+                _archive_executor = ThreadPoolExecutor(max_workers=ARCHIVE_WORKERS, thread_name_prefix="s3-archive")
+    future = _archive_executor.submit(contextvars.copy_context().run, func, *args)
+    with _archive_lock:
+        _archive_pending.add(future)
+    future.add_done_callback(_log_archive_failure)
+    return future
+
+def wait_for_archival(timeout=None):
+    """Block until queued background uploads finish; needed before a Lambda invocation returns"""
+    with _archive_lock:
+        pending = list(_archive_pending)
+    done, not_done = wait(pending, timeout=timeout)
+    return len(not_done) == 0
+
+@instrument("s3", payload=False, measure_result=False)
 def generate_presigned_url(s3_filename, expiration=3600):
     """Generate a pre-signed URL for an S3 object"""
     try:
         logger.info(f"Audit: Generating pre-signed URL - S3 Key: {s3_filename}, Expiration: {expiration}s")
-        url = s3.generate_presigned_url(
+        url = get_client('s3').generate_presigned_url(
             'get_object',
             Params={'Bucket': bucket_name, 'Key': s3_filename},
             ExpiresIn=expiration
@@ -1,58 +1,115 @@
-import streamlit as st
-import boto3
+import os
+import threading
 import logging
-from datetime import datetime, timedelta
 from botocore.exceptions import ClientError, BotoCoreError
+from .aws_clients import get_client
+from .cache_store import MemoryCache
+from .quota_store import QuotaTracker, create_quota_backend
 
 # Logger setup
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# AWS Cognito client
-cognito_client = boto3.client('cognito-idp', region_name='us-east-1')
-
 TIERS = {
-    "free": {"name": "Free", "cost": 0, "upload_limit": 5, "features": ["Text Extraction"]},
-    "basic": {"name": "Basic", "cost": 9, "upload_limit": 50, "features": ["Text Extraction", "Summarization", "PDF Download"]},
-    "pro": {"name": "Pro", "cost": 19, "upload_limit": 200, "features": ["Text Extraction", "Summarization", "Translation", "Speech Conversion", "PDF Download"]},
-    "enterprise": {"name": "Enterprise", "cost": 49, "upload_limit": float('inf'), "features": ["All Features", "Priority Processing"]}
+    "free": {"name": "Free", "cost": 0, "upload_limit": 5, "features": ["Text Extraction"], "extraction_profile": "lines"},
+    "basic": {"name": "Basic", "cost": 9, "upload_limit": 50, "features": ["Text Extraction", "Summarization", "PDF Download"], "extraction_profile": "lines"},
+    "pro": {"name": "Pro", "cost": 19, "upload_limit": 200, "features": ["Text Extraction", "Summarization", "Translation", "Speech Conversion", "PDF Download"], "extraction_profile": "lines"},
+    "enterprise": {"name": "Enterprise", "cost": 49, "upload_limit": float('inf'), "features": ["All Features", "Priority Processing"], "extraction_profile": "forms_tables"}
 }
 
-def fetch_subscription_tier(username):
-    """Fetch user's subscription tier from Cognito"""
+# Per-user tier cache so logins don't each cost a rate-limited admin_get_user call
+TIER_CACHE_TTL = int(os.getenv('TIER_CACHE_TTL', '900'))
+_tier_cache = MemoryCache(max_entries=10000, ttl=TIER_CACHE_TTL)
+_NOT_CACHED = object()
+
+# Durable upload quota; QUOTA_BACKEND selects sqlite (default) or dynamodb
+QUOTA_WRITE_BEHIND = os.getenv('QUOTA_WRITE_BEHIND', '').lower() in ('true', '1', 't')
+_quota_tracker = None
+_quota_lock = threading.Lock()
+
+def get_quota_tracker():
+    """Return the process-wide quota tracker, creating the backend on first use"""
+    global _quota_tracker
+    with _quota_lock:
+        if _quota_tracker is None:
+            _quota_tracker = QuotaTracker(create_quota_backend(), write_behind=QUOTA_WRITE_BEHIND)
+    return _quota_tracker
+
+def _quota_user_id():
+    """Identify the current user for quota accounting"""
+    import streamlit as st
+
+    user_info = st.session_state.get("user_info") or {}
+    return user_info.get("username") or user_info.get("email") or "anonymous"
+
+def _show_error(message):
+    """Show an error in the Streamlit UI; a no-op in the API, which has no UI"""
+    try:
+        import streamlit as st
+    except ImportError:
+        return
+    st.error(message)
+
+def tier_has_feature(tier, feature):
+    """Check whether a tier includes a feature (Enterprise includes all of them)"""
+    features = TIERS.get(tier or "free", TIERS["free"])["features"]
+    return feature in features or "All Features" in features
+
+def upload_limit(tier):
+    """Return a tier's monthly upload limit"""
+    return TIERS.get(tier or "free", TIERS["free"])["upload_limit"]
+
+def fetch_subscription_tier(username, claims=None):
+    """Fetch user's subscription tier from the verified token claims, the cache or Cognito"""
+    tier = (claims or {}).get("custom:subscription_tier")
+    if tier:
+        logger.info(f"Audit: Subscription tier read from token for user {username} - Tier: {tier}")
+        _tier_cache.set(username, tier)
+        return tier
+
+    cached = _tier_cache.get(username, _NOT_CACHED)
+    if cached is not _NOT_CACHED:
+        logger.info(f"Audit: Subscription tier cache hit for user {username} - Tier: {cached}")
+        return cached
+
     try:
         logger.info(f"Audit: Fetching subscription tier for user: {username}")
-        response = cognito_client.admin_get_user(
+        response = get_client('cognito-idp', region='us-east-1').admin_get_user(
             UserPoolId="us-east-1_xdDAqKLlX",
             Username=username
         )
         for attr in response["UserAttributes"]:
             if attr["Name"] == "custom:subscription_tier":
                 logger.info(f"Audit: Subscription tier found for user {username} - Tier: {attr['Value']}")
+                _tier_cache.set(username, attr["Value"])
                 return attr["Value"]
         logger.warning(f"No subscription tier set for user {username}")
+        _tier_cache.set(username, None)
         return None
     except (ClientError, BotoCoreError) as e:
         logger.error(f"Error fetching subscription tier for {username} - {e}", exc_info=True)
-        st.error("Error fetching subscription tier. Please try again.")
+        _show_error("Error fetching subscription tier. Please try again.")
         return None
     except Exception as e:
         logger.error(f"Unexpected error in fetch_subscription_tier - {e}", exc_info=True)
-        st.error("Unexpected error while checking subscription.")
+        _show_error("Unexpected error while checking subscription.")
         return None
 
 def update_subscription_tier(username, tier):
     """Update subscription tier in Cognito"""
+    import streamlit as st
+
     try:
         logger.info(f"Audit: Updating subscription tier for {username} to {tier}")
-        cognito_client.admin_update_user_attributes(
+        get_client('cognito-idp', region='us-east-1').admin_update_user_attributes(
             UserPoolId="us-east-1_xdDAqKLlX",
             Username=username,
             UserAttributes=[{"Name": "custom:subscription_tier", "Value": tier}]
         )
+        _tier_cache.delete(username)
+        get_quota_tracker().reset(username)
         st.session_state.subscription_tier = tier
         st.session_state.upload_count = 0
-        st.session_state.last_reset = datetime.now().isoformat()
         st.success(f"Subscribed to {TIERS[tier]['name']} tier!")
         logger.info(f"Audit: Subscription updated successfully for user {username}")
     except (ClientError, BotoCoreError) as e:
@@ -64,6 +121,8 @@ def update_subscription_tier(username, tier):
 
 def display_pricing():
     """Show subscription options"""
+    import streamlit as st
+
     try:
         st.title("📊 Choose Your Plan")
         cols = st.columns(4)
@@ -88,46 +147,53 @@ def display_pricing():
         logger.error(f"Error displaying pricing - {e}", exc_info=True)
         st.error("Failed to load pricing information.")
 
-def check_upload_limit():
-    """Enforce monthly upload limits"""
-    try:
-        if "last_reset" not in st.session_state:
-            st.session_state.last_reset = datetime.now().isoformat()
-
-        time_diff = datetime.now() - datetime.fromisoformat(st.session_state.last_reset)
-        if time_diff > timedelta(days=30):
-            st.session_state.upload_count = 0
-            st.session_state.last_reset = datetime.now().isoformat()
-            logger.info("Audit: Monthly upload limit reset")
+def reserve_upload():
+    """Atomically count an upload against the monthly limit before any paid extraction runs"""
+    import streamlit as st
 
+    try:
         tier_key = st.session_state.subscription_tier or "free"
         tier = TIERS[tier_key]
 
-        if st.session_state.get("upload_count", 0) >= tier["upload_limit"]:
+        allowed, used = get_quota_tracker().try_consume(_quota_user_id(), tier["upload_limit"])
+        st.session_state.upload_count = used
+        if not allowed:
             logger.warning(f"Upload limit reached for tier: {tier_key}")
             st.error(f"❗ {tier['name']} tier limit reached. Upgrade to continue.")
             return False
+        logger.info(f"Audit: Upload reserved - New count: {used}")
         return True
     except Exception as e:
-        logger.error(f"Error in check_upload_limit - {e}", exc_info=True)
+        logger.error(f"Error in reserve_upload - {e}", exc_info=True)
         st.error("Unexpected error while checking upload limit.")
         return False
 
-def increment_upload_count():
-    """Track upload usage"""
+def refund_upload():
+    """Give back a reserved upload when extraction failed or was served without a Textract call"""
+    import streamlit as st
+
     try:
-        st.session_state.upload_count = st.session_state.get("upload_count", 0) + 1
-        logger.info(f"Audit: Upload count incremented - New count: {st.session_state.upload_count}")
+        st.session_state.upload_count = get_quota_tracker().refund(_quota_user_id())
+        logger.info(f"Audit: Upload refunded - New count: {st.session_state.upload_count}")
     except Exception as e:
-        logger.error(f"Error incrementing upload count - {e}", exc_info=True)
+        logger.error(f"Error refunding upload - {e}", exc_info=True)
 
 def has_feature(feature):
     """Check feature availability"""
+    import streamlit as st
+
     try:
         tier = st.session_state.subscription_tier or "free"
-        has_it = feature in TIERS[tier]["features"]
+        has_it = tier_has_feature(tier, feature)
         logger.info(f"Audit: Feature check - Tier: {tier}, Feature: {feature}, Available: {has_it}")
         return has_it
     except Exception as e:
         logger.error(f"Error checking feature access - {e}", exc_info=True)
         return False
+
+def extraction_profile():
+    """Return the cheapest Textract profile that covers what the user's tier renders"""
+    import streamlit as st
+
+    tier = st.session_state.get("subscription_tier") or "free"
+    return TIERS.get(tier, TIERS["free"])["extraction_profile"]
@@ -1,11 +1,13 @@
 import logging
 import re
-from textblob import TextBlob
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?。！？])(?=\s)')
+WORD_BOUNDARY = re.compile(r'(?<=\s)(?=\S)')
+
 
 def clean_and_format_sentences(text):
     """Clean spacing without forcefully altering sentence structure."""
@@ -18,3 +20,52 @@ def clean_and_format_sentences(text):
         logger.error(f"Error during sentence cleanup - Error: {e}", exc_info=True)
         raise RuntimeError("Sentence cleanup failed") from e
 
+
+
+def byte_size(text):
+    """Length of text in UTF-8 bytes, the unit AWS text APIs limit requests by."""
+    return len(text.encode("utf-8"))
+
+
+def _pieces(text, max_bytes):
+    """Yield contiguous pieces of text that each fit max_bytes: sentences, else words, else characters."""
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        if byte_size(sentence) <= max_bytes:
+            yield sentence
+            continue
+        for word in WORD_BOUNDARY.split(sentence):
+            if byte_size(word) <= max_bytes:
+                yield word
+                continue
+            piece, size = [], 0
+            for char in word:
+                char_size = byte_size(char)
+                if piece and size + char_size > max_bytes:
+                    yield ''.join(piece)
+                    piece, size = [], 0
+                piece.append(char)
+                size += char_size
+            if piece:
+                yield ''.join(piece)
+
+
+def split_text_by_bytes(text, max_bytes):
+    """Split text into contiguous chunks of at most max_bytes UTF-8 bytes.
+
+    Chunks end at sentence boundaries where possible; joining them gives back
+    the original text exactly.
+    """
+    if byte_size(text) <= max_bytes:
+        return [text]
+    chunks = []
+    current, size = [], 0
+    for piece in _pieces(text, max_bytes):
+        piece_size = byte_size(piece)
+        if current and size + piece_size > max_bytes:
+            chunks.append(''.join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += piece_size
+    if current:
+        chunks.append(''.join(current))
+    return chunks
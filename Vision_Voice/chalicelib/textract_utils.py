@@ -1,56 +1,193 @@
-import boto3
+import os
+import time
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import BotoCoreError, ClientError
+from . import layout_engine
+from .aws_clients import get_client
+from .cache_store import DiskCache, cache_path
+from .metrics import instrument
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# Initialize Textract client
-textract = boto3.client('textract')
+# Extraction profiles, cheapest first; cost is the Textract list price per page (USD)
+EXTRACTION_PROFILES = {
+    "lines": {"feature_types": [], "cost_per_page": 0.0015},
+    "tables": {"feature_types": ["TABLES"], "cost_per_page": 0.015},
+    "forms": {"feature_types": ["FORMS"], "cost_per_page": 0.05},
+    "forms_tables": {"feature_types": ["FORMS", "TABLES"], "cost_per_page": 0.065},
+}
+DEFAULT_PROFILE = "lines"
+BUCKET_NAME = 'visionvoicegroupproject'
 
-def extract_text_from_image(s3_filename):
-    """Extract structured text from an image using Textract with improved formatting preservation."""
-    bucket_name = 'visionvoicegroupproject'
+# Multi-page formats that go through the asynchronous StartDocument* APIs
+ASYNC_DOCUMENT_EXTENSIONS = ('.pdf', '.tif', '.tiff')
 
+# Largest payload the synchronous APIs accept inline as Document.Bytes
+SYNC_BYTES_LIMIT = 5 * 1024 * 1024
+# Send small images inline instead of waiting for the S3 upload to finish
+DIRECT_BYTES = os.getenv('TEXTRACT_DIRECT_BYTES', 'true').lower() in ('true', '1', 't')
+
+# Persistent cache of extracted text, keyed by image content and feature types
+_result_cache = None
+# Part of every result cache key; bump whenever format_blocks or layout_engine changes the rendered text
+FORMAT_VERSION = 2
+
+def get_result_cache():
+    """Return the on-disk Textract result cache, creating it on first use."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = DiskCache(cache_path("textract_cache.db"))
+    return _result_cache
+
+def result_cache_key(image_bytes, profile=DEFAULT_PROFILE):
+    """Build the cache key from the format version, the image SHA-256 and the profile's sorted feature types."""
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    return f"v{FORMAT_VERSION}:{digest}:{','.join(sorted(EXTRACTION_PROFILES[profile]['feature_types']))}"
+
+def lookup_cached_text(image_bytes, profile=DEFAULT_PROFILE):
+    """Return previously extracted text for these image bytes, or None."""
     try:
-        logger.info(f"Audit: Textract analysis started - Bucket: {bucket_name}, Key: {s3_filename}")
+        text = get_result_cache().get(result_cache_key(image_bytes, profile))
+        if text is not None:
+            logger.info("Audit: Textract cache hit")
+        return text
+    except Exception as e:
+        logger.warning(f"Textract cache lookup failed - Error: {e}")
+        return None
 
-        response = textract.analyze_document(
-            Document={'S3Object': {'Bucket': bucket_name, 'Name': s3_filename}},
-            FeatureTypes=["FORMS", "TABLES"]
-        )
+# Per-profile call, page, latency and estimated cost counters
+_profile_stats = {name: {"calls": 0, "pages": 0, "seconds": 0.0, "cost": 0.0} for name in EXTRACTION_PROFILES}
+_profile_lock = threading.Lock()
 
-        blocks = response.get('Blocks', [])
-        lines_by_y = []
+def _record_profile_usage(profile, pages, seconds):
+    with _profile_lock:
+        stats = _profile_stats[profile]
+        stats["calls"] += 1
+        stats["pages"] += pages
+        stats["seconds"] += seconds
+        stats["cost"] += pages * EXTRACTION_PROFILES[profile]["cost_per_page"]
+    logger.info(f"Audit: Textract profile usage - Profile: {profile}, Pages: {pages}, Latency: {seconds:.2f}s")
+
+def get_profile_stats():
+    """Return a snapshot of per-profile latency and cost counters."""
+    with _profile_lock:
+        return {name: dict(stats) for name, stats in _profile_stats.items()}
+
+def is_multipage_document(filename):
+    """Return True for formats that need the asynchronous document APIs."""
+    return filename.lower().endswith(ASYNC_DOCUMENT_EXTENSIONS)
+
+def format_line_blocks(blocks):
+    """Rebuild readable text from the LINE blocks of a single page."""
+    return layout_engine.reconstruct_text(blocks).strip()
 
-        # Only LINE blocks
-        for block in blocks:
-            if block['BlockType'] == 'LINE':
-                text = block['Text'].strip()
-                y_coord = block['Geometry']['BoundingBox']['Top']
-                lines_by_y.append((y_coord, text))
+def _block_text(block, blocks_by_id):
+    """Join the WORD (and selected checkbox) children of a block."""
+    words = []
+    for relationship in block.get('Relationships', []):
+        if relationship['Type'] != 'CHILD':
+            continue
+        for child_id in relationship['Ids']:
+            child = blocks_by_id.get(child_id, {})
+            if child.get('BlockType') == 'WORD':
+                words.append(child['Text'])
+            elif child.get('BlockType') == 'SELECTION_ELEMENT' and child.get('SelectionStatus') == 'SELECTED':
+                words.append('[x]')
+    return ' '.join(words)
 
-        # Sort by vertical Y position
-        lines_by_y.sort(key=lambda x: x[0])
+def format_form_fields(blocks):
+    """Render KEY_VALUE_SET blocks as 'key: value' lines."""
+    blocks_by_id = {block['Id']: block for block in blocks if 'Id' in block}
+    fields = []
+    for block in blocks:
+        if block['BlockType'] != 'KEY_VALUE_SET' or 'KEY' not in block.get('EntityTypes', []):
+            continue
+        key = _block_text(block, blocks_by_id)
+        values = [
+            _block_text(blocks_by_id[value_id], blocks_by_id)
+            for relationship in block.get('Relationships', []) if relationship['Type'] == 'VALUE'
+            for value_id in relationship['Ids'] if value_id in blocks_by_id
+        ]
+        if key:
+            fields.append(f"{key}: {' '.join(values).strip()}")
+    return "\n".join(fields)
 
-        formatted_text = ""
-        previous_y = 0
-        for idx, (y, text) in enumerate(lines_by_y):
-            # Add line break if vertical distance is large (new paragraph)
-            if idx > 0 and abs(y - previous_y) > 0.01:
-                formatted_text += "\n"
+def format_tables(blocks):
+    """Render TABLE/CELL blocks as pipe-separated rows, one table per paragraph."""
+    blocks_by_id = {block['Id']: block for block in blocks if 'Id' in block}
+    tables = []
+    for block in blocks:
+        if block['BlockType'] != 'TABLE':
+            continue
+        rows = {}
+        for relationship in block.get('Relationships', []):
+            if relationship['Type'] != 'CHILD':
+                continue
+            for cell_id in relationship['Ids']:
+                cell = blocks_by_id.get(cell_id, {})
+                if cell.get('BlockType') == 'CELL':
+                    rows.setdefault(cell['RowIndex'], {})[cell['ColumnIndex']] = _block_text(cell, blocks_by_id)
+        tables.append("\n".join(
+            " | ".join(cells[col] for col in sorted(cells)) for _, cells in sorted(rows.items())
+        ))
+    return "\n\n".join(tables)
 
-            # Add bullet-like formatting if line starts with dash or bullet
-            if text.lstrip().startswith(('-', '*', '•')):
-                formatted_text += f"• {text.lstrip('-•* ').strip()}\n"
-            else:
-                formatted_text += text + "\n"
+def format_blocks(blocks, feature_types):
+    """Render page text plus any form fields and tables the profile paid for."""
+    sections = [format_line_blocks(blocks)]
+    if "FORMS" in feature_types:
+        sections.append(format_form_fields(blocks))
+    if "TABLES" in feature_types:
+        sections.append(format_tables(blocks))
+    return "\n\n".join(section for section in sections if section)
 
-            previous_y = y
+def can_send_bytes(filename, image_bytes):
+    """Return True if a document can be sent to Textract inline rather than via S3."""
+    return (DIRECT_BYTES and image_bytes is not None and len(image_bytes) <= SYNC_BYTES_LIMIT
+            and not is_multipage_document(filename))
 
-        logger.info(f"Audit: Textract analysis successful - Extracted {len(lines_by_y)} lines")
-        return formatted_text.strip()
+@instrument("textract", payload="image_bytes")
+def extract_text_from_image(s3_filename, image_bytes=None, profile=DEFAULT_PROFILE, send_bytes=False):
+    """Extract structured text from an image using Textract with improved formatting preservation.
+
+    The "lines" profile uses the cheaper DetectDocumentText API; the other
+    profiles call AnalyzeDocument and render the form fields and tables they
+    pay for. With send_bytes the image is passed inline as Document.Bytes,
+    so s3_filename need not be uploaded yet; otherwise Textract reads the
+    S3 object. When image_bytes is given, the result is stored in the
+    persistent cache so later lookups for the same content skip S3 and Textract.
+    """
+    bucket_name = BUCKET_NAME
+    feature_types = EXTRACTION_PROFILES[profile]["feature_types"]
+
+    try:
+        if send_bytes:
+            if image_bytes is None or len(image_bytes) > SYNC_BYTES_LIMIT:
+                raise ValueError("Inline Textract documents must be at most 5 MB")
+            logger.info(f"Audit: Textract analysis started - Inline bytes: {len(image_bytes)}, Key: {s3_filename}, Profile: {profile}")
+            document = {'Bytes': image_bytes}
+        else:
+            logger.info(f"Audit: Textract analysis started - Bucket: {bucket_name}, Key: {s3_filename}, Profile: {profile}")
+            document = {'S3Object': {'Bucket': bucket_name, 'Name': s3_filename}}
+        start = time.perf_counter()
+        if feature_types:
+            response = get_client('textract').analyze_document(Document=document, FeatureTypes=feature_types)
+        else:
+            response = get_client('textract').detect_document_text(Document=document)
+        _record_profile_usage(profile, response.get('DocumentMetadata', {}).get('Pages', 1), time.perf_counter() - start)
+
+        blocks = response.get('Blocks', [])
+        formatted_text = format_blocks(blocks, feature_types)
+        line_count = sum(1 for block in blocks if block['BlockType'] == 'LINE')
+        logger.info(f"Audit: Textract analysis successful - Extracted {line_count} lines")
+        if image_bytes is not None:
+            _store_cached_text(image_bytes, formatted_text, profile)
+        return formatted_text
 
     except (ClientError, BotoCoreError) as e:
         logger.error(f"Textract Client Error - S3 Key: {s3_filename}, Error: {e}", exc_info=True)
@@ -58,3 +195,109 @@ def extract_text_from_image(s3_filename):
     except Exception as e:
         logger.error(f"Unexpected error during Textract analysis - S3 Key: {s3_filename}, Error: {e}", exc_info=True)
         raise RuntimeError("Unexpected error in Textract text extraction") from e
+
+@instrument("textract", payload="image_bytes")
+def extract_text_from_document(s3_filename, image_bytes=None, profile=DEFAULT_PROFILE, client=None,
+                               poll_interval=1.0, max_poll_interval=10.0, timeout=900,
+                               wait_for_completion=None, notification_channel=None, max_workers=4,
+                               sleep=time.sleep):
+    """Extract text from a multi-page PDF/TIFF in S3 using an asynchronous Textract job.
+
+    The job is started with StartDocumentTextDetection for the "lines" profile
+    or StartDocumentAnalysis for the others, and awaited either by polling with exponential
+    backoff or, when wait_for_completion is given, by calling it with the job ID
+    so a notification listener (e.g. SNS→SQS) can block until the job finishes.
+    Result pages are fetched in order while completed pages are laid out in a
+    thread pool. Pass a stubbed client to test without AWS.
+    """
+    client = client or get_client('textract')
+    bucket_name = BUCKET_NAME
+    feature_types = EXTRACTION_PROFILES[profile]["feature_types"]
+
+    try:
+        logger.info(f"Audit: Async Textract job starting - Bucket: {bucket_name}, Key: {s3_filename}, Profile: {profile}")
+        start = time.perf_counter()
+        start_params = {'DocumentLocation': {'S3Object': {'Bucket': bucket_name, 'Name': s3_filename}}}
+        if notification_channel:
+            start_params['NotificationChannel'] = notification_channel
+        if feature_types:
+            job_id = client.start_document_analysis(FeatureTypes=list(feature_types), **start_params)['JobId']
+            get_results = client.get_document_analysis
+        else:
+            job_id = client.start_document_text_detection(**start_params)['JobId']
+            get_results = client.get_document_text_detection
+
+        if wait_for_completion is not None:
+            wait_for_completion(job_id)
+        response = _wait_for_job(get_results, job_id, poll_interval, max_poll_interval, timeout, sleep)
+
+        page_count = response.get('DocumentMetadata', {}).get('Pages', 0)
+        text = _collect_pages(get_results, job_id, response, feature_types, max_workers)
+        _record_profile_usage(profile, page_count, time.perf_counter() - start)
+        logger.info(f"Audit: Async Textract job successful - Job: {job_id}, Pages: {page_count}")
+        if image_bytes is not None:
+            _store_cached_text(image_bytes, text, profile)
+        return text
+
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f"Textract Client Error - S3 Key: {s3_filename}, Error: {e}", exc_info=True)
+        raise RuntimeError("Failed to analyze document with Textract") from e
+    except Exception as e:
+        logger.error(f"Unexpected error during async Textract analysis - S3 Key: {s3_filename}, Error: {e}", exc_info=True)
+        raise RuntimeError("Unexpected error in Textract document extraction") from e
+
+def _wait_for_job(get_results, job_id, poll_interval, max_poll_interval, timeout, sleep):
+    """Poll a Textract job with exponential backoff; return its first result page."""
+    deadline = time.monotonic() + timeout
+    delay = poll_interval
+    while True:
+        response = get_results(JobId=job_id, MaxResults=1000)
+        status = response.get('JobStatus')
+        if status in ('SUCCEEDED', 'PARTIAL_SUCCESS'):
+            if status == 'PARTIAL_SUCCESS':
+                logger.warning(f"Textract job {job_id} partially succeeded - Warnings: {response.get('Warnings')}")
+            return response
+        if status == 'FAILED':
+            raise RuntimeError(f"Textract job {job_id} failed: {response.get('StatusMessage', 'unknown error')}")
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Textract job {job_id} did not finish within {timeout}s")
+        sleep(delay)
+        delay = min(delay * 2, max_poll_interval)
+
+def _collect_pages(get_results, job_id, first_response, feature_types, max_workers):
+    """Fetch every result page and lay out each document page in parallel."""
+    pages = {}
+    futures = {}
+    response = first_response
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            for block in response.get('Blocks', []):
+                pages.setdefault(block.get('Page', 1), []).append(block)
+
+            # Results arrive in page order, so every page before the last one seen is complete
+            last_page = max(pages) if pages else 0
+            for page in sorted(pages):
+                if page < last_page and page not in futures:
+                    futures[page] = executor.submit(format_blocks, pages[page], feature_types)
+
+            next_token = response.get('NextToken')
+            if not next_token:
+                break
+            response = get_results(JobId=job_id, MaxResults=1000, NextToken=next_token)
+
+        for page in pages:
+            if page not in futures:
+                futures[page] = executor.submit(format_blocks, pages[page], feature_types)
+        page_texts = [futures[page].result() for page in sorted(futures)]
+
+    return "\n\n".join(text for text in page_texts if text)
+
+def _store_cached_text(image_bytes, text, profile=DEFAULT_PROFILE):
+    """Store extracted text in the persistent cache, logging but ignoring failures."""
+    try:
+        cache = get_result_cache()
+        cache.set(result_cache_key(image_bytes, profile), text)
+        stats = cache.stats()
+        logger.info(f"Audit: Textract cache stored - Hits: {stats['hits']}, Misses: {stats['misses']}, Entries: {stats['entries']}")
+    except Exception as e:
+        logger.warning(f"Textract cache store failed - Error: {e}")
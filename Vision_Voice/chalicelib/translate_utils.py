@@ -1,32 +1,179 @@
-import boto3
+import os
+import re
 import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import BotoCoreError, ClientError
+from .aws_clients import get_client
+from .cache_store import cache_path
+from .metrics import instrument
+from .text_processing import byte_size, split_text_by_bytes
+from .translation_memory import TranslationMemory
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# Initialize AWS Translate client
-translate = boto3.client('translate')
+# Paragraph-level translation memory; set TRANSLATION_MEMORY_DISK to persist it
+_use_disk = os.getenv('TRANSLATION_MEMORY_DISK', '').lower() in ('true', '1', 't')
+translation_memory = TranslationMemory(
+    disk_path=cache_path("translation_memory.db") if _use_disk else None
+)
 
-def translate_text(text, target_language_code='fr'):
-    """Translate the given text to the target language using AWS Translate."""
+# Target language codes Amazon Translate supports
+SUPPORTED_LANGUAGES = frozenset((
+    "af", "am", "ar", "az", "bg", "bn", "bs", "ca", "cs", "cy", "da", "de", "el", "en", "es", "es-MX",
+    "et", "fa", "fa-AF", "fi", "fr", "fr-CA", "ga", "gu", "ha", "he", "hi", "hr", "ht", "hu", "hy", "id",
+    "is", "it", "ja", "ka", "kk", "kn", "ko", "lt", "lv", "mk", "ml", "mn", "mr", "ms", "mt", "nl", "no",
+    "pa", "pl", "ps", "pt", "pt-PT", "ro", "ru", "si", "sk", "sl", "so", "sq", "sr", "sv", "sw", "ta",
+    "te", "th", "tl", "tr", "uk", "ur", "uz", "vi", "zh", "zh-TW",
+))
+
+# TranslateText accepts at most 10,000 bytes of UTF-8 text per request
+MAX_TEXT_BYTES = 10000
+TRANSLATE_WORKERS = int(os.getenv('TRANSLATE_WORKERS', '8'))
+# Paragraphs packed into one request are joined by a blank line and split apart again afterwards
+PARAGRAPH_SEPARATOR = '\n\n'
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=TRANSLATE_WORKERS, thread_name_prefix="translate")
+    return _executor
+
+def split_paragraphs(text):
+    """Split text into paragraphs, keeping the blank-line separators in place."""
+    return re.split(r'(\n\s*\n)', text)
+
+def _rewrap(original, translated_body):
+    """Put the original's leading and trailing whitespace around a translated body."""
+    leading = original[:len(original) - len(original.lstrip())]
+    trailing = original[len(original.rstrip()):]
+    return leading + translated_body + trailing
+
+def _translate_chunk(chunk, source_language_code, target_language_code):
+    """Translate one chunk, keeping its leading and trailing whitespace."""
+    body = chunk.strip()
+    if not body:
+        return chunk
+    response = get_client('translate').translate_text(
+        Text=body,
+        SourceLanguageCode=source_language_code,
+        TargetLanguageCode=target_language_code
+    )
+    return _rewrap(chunk, response.get('TranslatedText', ''))
+
+def pack_paragraphs(paragraphs, max_bytes=MAX_TEXT_BYTES):
+    """Group consecutive paragraphs into batches whose joined text fits one request.
+
+    A paragraph too large to share a request ends up in a batch of its own.
+    """
+    separator_size = byte_size(PARAGRAPH_SEPARATOR)
+    batches, current, size = [], [], 0
+    for paragraph in paragraphs:
+        paragraph_size = byte_size(paragraph.strip())
+        if current and size + separator_size + paragraph_size > max_bytes:
+            batches.append(current)
+            current, size = [], 0
+        size += paragraph_size + (separator_size if current else 0)
+        current.append(paragraph)
+    if current:
+        batches.append(current)
+    return batches
+
+def _translate_batch(paragraphs, source_language_code, target_language_code):
+    """Translate several paragraphs in one request; returns their translations in order.
+
+    If the service merges or splits paragraphs, so the blank lines no longer
+    line up, each paragraph is translated on its own instead.
+    """
+    joined = PARAGRAPH_SEPARATOR.join(paragraph.strip() for paragraph in paragraphs)
+    pieces = PARAGRAPH_BREAK.split(_translate_chunk(joined, source_language_code, target_language_code).strip())
+    if len(pieces) == len(paragraphs):
+        return [_rewrap(paragraph, piece.strip()) for paragraph, piece in zip(paragraphs, pieces)]
+    logger.warning(f"Packed translation returned {len(pieces)} paragraphs for {len(paragraphs)}; retrying one by one")
+    return [_translate_chunk(paragraph, source_language_code, target_language_code) for paragraph in paragraphs]
+
+@instrument("translate")
+def translate_to_languages(text, target_language_codes, source_language_code='auto'):
+    """Translate text into several languages at once; returns {language code: translation}.
+
+    Paragraphs found in the translation memory are reused. The misses for
+    each language are packed into as few requests as the service's byte
+    limit allows; paragraphs over the limit are split at sentence
+    boundaries. Requests run concurrently and are reassembled in order.
+    """
+    targets = list(dict.fromkeys(target_language_codes))
     if not text.strip():
         logger.warning("Empty input text provided to translate_text")
-        return text
+        return {target: text for target in targets}
 
     try:
-        logger.info(f"Audit: Starting translation - Target language: {target_language_code}")
+        logger.info(f"Audit: Starting translation - Target languages: {', '.join(targets)}")
 
-        response = translate.translate_text(
-            Text=text,
-            SourceLanguageCode='auto',
-            TargetLanguageCode=target_language_code
-        )
+        parts = split_paragraphs(text)
+        translated_parts = {target: list(parts) for target in targets}
+        # (target, memory key) -> (paragraph, paragraph indexes)
+        pending = {}
+        for target in targets:
+            for idx in range(0, len(parts), 2):
+                paragraph = parts[idx]
+                if not paragraph.strip():
+                    continue
+                remembered = translation_memory.get(paragraph, source_language_code, target)
+                if remembered is not None:
+                    translated_parts[target][idx] = remembered
+                else:
+                    key = (target, translation_memory.key(paragraph, source_language_code, target))
+                    pending.setdefault(key, (paragraph, []))[1].append(idx)
+
+        def submit(func, payload, target):
+            return executor.submit(contextvars.copy_context().run, func, payload, source_language_code, target)
+
+        executor = _get_executor()
+        # (memory keys of the batch, futures, whether the futures are chunks of a single paragraph)
+        batches = []
+        for target in targets:
+            keys = [key for key in pending if key[0] == target]
+            for batch in pack_paragraphs([pending[key][0] for key in keys]):
+                batch_keys, keys = keys[:len(batch)], keys[len(batch):]
+                if len(batch) == 1:
+                    batches.append((batch_keys, [submit(_translate_chunk, chunk, target)
+                                                 for chunk in split_text_by_bytes(batch[0], MAX_TEXT_BYTES)], True))
+                else:
+                    batches.append((batch_keys, [submit(_translate_batch, batch, target)], False))
+        requests = sum(len(futures) for _, futures, _ in batches)
 
-        translated_text = response.get('TranslatedText', '')
-        logger.info("Audit: Translation successful")
-        return translated_text
+        try:
+            for batch_keys, futures, chunked in batches:
+                if chunked:
+                    translations = [''.join(future.result() for future in futures)]
+                else:
+                    translations = futures[0].result()
+                for key, translated in zip(batch_keys, translations):
+                    paragraph, indexes = pending[key]
+                    translation_memory.put(paragraph, source_language_code, key[0], translated)
+                    for idx in indexes:
+                        translated_parts[key[0]][idx] = translated
+        except Exception:
+            for _, futures, _ in batches:
+                for future in futures:
+                    future.cancel()
+            raise
+
+        stats = translation_memory.stats()
+        logger.info(
+            f"Audit: Translation successful - Paragraphs sent: {len(pending)}, Requests: {requests}, "
+            f"Hit ratio: {stats['hit_ratio']:.2f}, Billed chars saved: {stats['saved_chars']}"
+        )
+        return {target: ''.join(translated_parts[target]) for target in targets}
 
     except (BotoCoreError, ClientError) as e:
         logger.error(f"Translate client error - Error: {e}", exc_info=True)
@@ -34,3 +181,10 @@ def translate_text(text, target_language_code='fr'):
     except Exception as e:
         logger.error(f"Unexpected error in translate_text - Error: {e}", exc_info=True)
         raise RuntimeError("Unexpected error during translation") from e
+
+def translate_text(text, target_language_code='fr', source_language_code='auto'):
+    """Translate the given text to the target language using AWS Translate.
+
+    Not instrumented itself: the call is recorded once, by translate_to_languages.
+    """
+    return translate_to_languages(text, [target_language_code], source_language_code)[target_language_code]
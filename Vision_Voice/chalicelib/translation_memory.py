@@ -0,0 +1,88 @@
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from .cache_store import DiskCache
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def normalize_segment(segment):
+    """Collapse whitespace so trivially different paragraphs share an entry."""
+    return re.sub(r'\s+', ' ', segment).strip()
+
+
+class TranslationMemory:
+    """Bounded in-memory translation memory with an optional on-disk tier.
+
+    Entries are keyed by (normalized segment hash, source language, target
+    language). With a disk path, every entry is also written to a DiskCache
+    and memory misses fall back to it, so entries survive eviction and restarts.
+    """
+
+    def __init__(self, max_entries=2048, disk_path=None):
+        self.max_entries = max_entries
+        self.disk = DiskCache(disk_path) if disk_path else None
+        self.hits = 0
+        self.misses = 0
+        self.billed_chars = 0
+        self.saved_chars = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(segment, source_language, target_language):
+        digest = hashlib.sha256(normalize_segment(segment).encode("utf-8")).hexdigest()
+        return f"{digest}:{source_language}:{target_language}"
+
+    def get(self, segment, source_language, target_language):
+        """Return the remembered translation for a segment, or None."""
+        key = self.key(segment, source_language, target_language)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_chars += len(segment)
+                return self._entries[key]
+
+        translation = self.disk.get(key) if self.disk else None
+        with self._lock:
+            if translation is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_chars += len(segment)
+            self._remember(key, translation)
+        return translation
+
+    def put(self, segment, source_language, target_language, translation):
+        """Remember a translation that was billed by the service."""
+        key = self.key(segment, source_language, target_language)
+        with self._lock:
+            self.billed_chars += len(segment)
+            self._remember(key, translation)
+        if self.disk:
+            self.disk.set(key, translation)
+
+    def _remember(self, key, translation):
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Return hit ratio and billed/saved character counts."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "billed_chars": self.billed_chars,
+                "saved_chars": self.saved_chars,
+                "entries": len(self._entries)
+            }
@@ -0,0 +1,71 @@
+import os
+import sys
+import subprocess
+
+# chalicelib modules imported by the app entry points
+MODULES = [
+    "chalicelib.pipeline",
+    "chalicelib.orchestrator",
+    "chalicelib.jobs",
+    "chalicelib.aws_clients",
+    "chalicelib.cognito_auth",
+    "chalicelib.subscription",
+    "chalicelib.metrics",
+    "chalicelib.aws_tracing",
+]
+
+# Dependencies that must only be imported on first use, never at module import
+DEFERRED = ["boto3", "reportlab", "textblob", "authlib", "requests", "numpy", "scipy", "PIL"]
+
+# Budget for chalicelib's own cumulative import time, excluding streamlit
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "150"))
+
+
+def measure_import(module):
+    """Import a module in a fresh interpreter with -X importtime and parse the report."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        timings[name] = int(cumulative)
+    return timings
+
+
+def check_module(module):
+    """Return a list of problems found for one module."""
+    timings = measure_import(module)
+    problems = []
+
+    loaded = [dep for dep in DEFERRED if dep in timings]
+    if loaded:
+        problems.append(f"{module} imports deferred dependencies at import time: {', '.join(loaded)}")
+
+    own_ms = (timings.get(module, 0) - timings.get("streamlit", 0)) / 1000
+    print(f"{module}: {own_ms:.1f} ms (excluding streamlit)")
+    if own_ms > BUDGET_MS:
+        problems.append(f"{module} took {own_ms:.1f} ms to import (budget {BUDGET_MS:.0f} ms)")
+    return problems
+
+
+if __name__ == "__main__":
+    print("=== chalicelib import-time check ===")
+    problems = []
+    for module in MODULES:
+        problems.extend(check_module(module))
+
+    if problems:
+        print("\n❌ FAILED:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("\n✅ SUCCESS: chalicelib imports are within budget")
@@ -0,0 +1,501 @@
+import streamlit as st
+import io
+import os
+from dotenv import load_dotenv
+
+# Load environment variables before chalicelib reads its configuration
+load_dotenv()
+
+from chalicelib import aws_tracing, metrics
+from chalicelib.pipeline import SourceDocument, StageMemo, build_document_pipeline
+from chalicelib.orchestrator import run_pipeline
+from chalicelib.polly_utils import audio_location_url
+from chalicelib.translate_utils import translation_memory
+import uuid
+import traceback
+from chalicelib.subscription import (
+    fetch_subscription_tier,
+    display_pricing,
+    reserve_upload,
+    refund_upload,
+    has_feature,
+    extraction_profile
+)
+import logging
+
+
+# Force full-width layout and improve visuals
+st.markdown("""
+    <style>
+        /* Make app use full width */
+        .main .block-container {
+            padding-top: 2rem;
+            padding-bottom: 2rem;
+            padding-left: 3rem;
+            padding-right: 3rem;
+            max-width: 100%;
+        }
+
+        /* Improve button appearance */
+        .stButton > button {
+            background-color: #4CAF50;
+            color: white;
+            font-size: 16px;
+            padding: 0.5em 1em;
+            border-radius: 8px;
+        }
+        .stButton > button:hover {
+            background-color: #45a049;
+        }
+
+        /* Card-like section for description */
+        .app-intro {
+            background-color: #f9f9f9;
+            border-radius: 12px;
+            padding: 1.5rem;
+            margin-bottom: 2rem;
+            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.05);
+        }
+    </style>
+""", unsafe_allow_html=True)
+
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Set up development mode
+DEV_MODE = os.getenv('COGNITO_DEVELOPMENT_MODE', '').lower() in ('true', '1', 't')
+
+# Stage metrics: Prometheus endpoint on METRICS_PORT, sidebar panel for admins
+METRICS_ADMIN_PANEL = os.getenv('METRICS_ADMIN_PANEL', '').lower() in ('true', '1', 't')
+if metrics.METRICS_PORT:
+    try:
+        metrics.start_metrics_server()
+    except OSError as e:
+        logging.warning(f"Metrics endpoint not started on port {metrics.METRICS_PORT}: {e}")
+
+@st.cache_resource(show_spinner=False)
+def get_auth():
+    """Build CognitoAuth once per process instead of on every script run"""
+    from chalicelib.cognito_auth import CognitoAuth
+    return CognitoAuth()
+
+# Try to import and initialize Cognito auth
+try:
+    auth = get_auth()
+    auth_enabled = True
+except Exception as e:
+    if DEV_MODE:
+        st.warning("⚠️ Running in development mode without authentication")
+        auth_enabled = False
+    else:
+        st.error(f"❌ Authentication error: {str(e)}")
+        st.error(traceback.format_exc())
+        auth_enabled = False
+
+def initialize_session_state():
+    """Initialize session state variables"""
+    defaults = {
+        "authenticated": not auth_enabled or DEV_MODE,
+        "user_info": {"name": "Developer", "email": "dev@example.com"} if DEV_MODE else None,
+        "access_token": "dev-token" if DEV_MODE else None,
+        "subscription_tier": "free" if DEV_MODE else None,
+        "upload_count": 0,
+        "manage_subscription": False,
+        "trace_id": uuid.uuid4().hex
+    }
+    
+    for key, value in defaults.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
+    # Record which AWS settings are present to help diagnose credential problems
+    logger.debug(f"AWS_ACCESS_KEY_ID exists: {os.getenv('AWS_ACCESS_KEY_ID') is not None}")
+    logger.debug(f"AWS_SECRET_ACCESS_KEY exists: {os.getenv('AWS_SECRET_ACCESS_KEY') is not None}")
+    logger.debug(f"AWS_REGION: {os.getenv('AWS_REGION')}")
+    logger.debug(f"S3_BUCKET_NAME: {os.getenv('S3_BUCKET_NAME')}")
+
+def handle_auth_callback():
+    """Handle the OAuth callback after user login"""
+    if not auth_enabled or DEV_MODE:
+        return
+    
+    query_params = st.query_params
+    if "code" in query_params:
+        try:
+            code = query_params["code"]
+            
+            # Prevent replay attacks
+            if "last_processed_code" in st.session_state and st.session_state.last_processed_code == code:
+                st.query_params.clear()
+                return
+            
+            # Validate state
+            if "state" in query_params and "oauth_state" in st.session_state:
+                if query_params["state"] != st.session_state.oauth_state:
+                    raise ValueError("State parameter mismatch")
+            
+            # Get tokens and user info
+            tokens = auth.get_tokens(code)
+            user_info = auth.get_user_info(tokens["access_token"], id_token=tokens.get("id_token"))
+            
+            # Set session state
+            st.session_state.update({
+                "access_token": tokens["access_token"],
+                "user_info": user_info,
+                "authenticated": True,
+                "last_processed_code": code,
+                "oauth_state": None,
+                "subscription_tier": fetch_subscription_tier(user_info["username"], claims=user_info)
+            })
+            
+            st.query_params.clear()
+            st.rerun()
+        except Exception as e:
+            st.error(f"Authentication error: {str(e)}")
+            st.session_state.authenticated = False
+            st.query_params.clear()
+            st.rerun()
+
+def login_page():
+    """Display login page with intro and styling"""
+    st.title("✍ VisionVoice: Handwriting to Voice")
+
+    # Intro card
+    st.markdown(
+        """
+        <div class="app-intro">
+            <h3>Welcome to VisionVoice 👋</h3>
+            <p><strong>VisionVoice</strong> helps transform handwritten content into meaningful, accessible experiences for visually impaired and blind users.</p>
+            <ul>
+                <li>📝 Extract handwritten text from photos</li>
+                <li>🧠 Summarize long passages (Basic tier)</li>
+                <li>🌍 Translate into Spanish, French, and more (Pro tier)</li>
+                <li>🔊 Convert text to natural voice</li>
+                <li>📄 Download results as a PDF</li>
+            </ul>
+            <p>Sign in to get started and explore the features tailored to your needs!</p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+    st.header("🔐 Login")
+
+    if auth_enabled:
+        st.subheader("Sign in to VisionVoice")
+        if st.button("Sign in with Cognito"):
+            try:
+                login_url = auth.get_login_url()
+                st.markdown(f'<meta http-equiv="refresh" content="0;url={login_url}">', unsafe_allow_html=True)
+            except Exception as e:
+                st.error(f"Failed to generate login URL: {str(e)}")
+    else:
+        st.error("Authentication configuration error")
+        if DEV_MODE and st.button("Continue in development mode"):
+            st.rerun()
+
+
+
+def logout():
+    """Handle logout process"""
+    st.session_state.authenticated = False
+    st.session_state.user_info = None
+    st.session_state.subscription_tier = None
+    cancel_active_jobs()
+    
+    if auth_enabled and not DEV_MODE:
+        try:
+            logout_url = auth.logout_url()
+            st.markdown(f'<meta http-equiv="refresh" content="0;url={logout_url}">', unsafe_allow_html=True)
+        except Exception as e:
+            st.error(f"Logout error: {str(e)}")
+            st.rerun()
+    else:
+        st.rerun()
+
+def get_pipeline():
+    """Build the document pipeline backed by this session's stage memo"""
+    if "stage_memo" not in st.session_state:
+        st.session_state.stage_memo = StageMemo()
+    return build_document_pipeline(st.session_state.stage_memo)
+
+def cancel_active_jobs():
+    """Cancel pipeline jobs left over from a previous run of the script"""
+    for job in st.session_state.get("active_jobs", []):
+        if not job.done():
+            job.cancel()
+    st.session_state.active_jobs = []
+
+def start_job(pipeline, source, targets):
+    """Run the given stages in the background and track the job for cancellation"""
+    job = run_pipeline(pipeline, source, targets)
+    st.session_state.active_jobs.append(job)
+    return job
+
+def process_file(uploaded_file):
+    """Process uploaded file with tier restrictions"""
+    source = SourceDocument(uploaded_file.getvalue(), uploaded_file.name)
+    # Widget keys tie each file's choices to its content
+    key = source.digest[:12]
+    pipeline = get_pipeline()
+    pipeline.set_params("extract", profile=extraction_profile())
+
+    # Reserve the upload before Textract runs so concurrent tabs can't overrun the limit;
+    # documents already processed in this session don't count again
+    reserved = not pipeline.is_cached("extract", source)
+    if reserved and not reserve_upload():
+        return
+
+    # Extract text; cleaning starts as soon as extraction finishes
+    st.info("🧠 Extracting handwritten text...")
+    job = start_job(pipeline, source, ["clean"])
+    try:
+        extracted_text = job.result("extract")
+    except Exception:
+        if reserved:
+            refund_upload()
+        raise
+    if reserved and not job.computed("extract"):
+        # Another run of this document (cached or joined) already did the paid work
+        refund_upload()
+
+    stats = job.result("preprocess").stats
+    if stats.get("bytes_saved", 0) > 0:
+        st.caption(
+            f"🗜 Optimized image: {stats['original_bytes'] / 1e6:.1f} MB → {stats['processed_bytes'] / 1e6:.1f} MB "
+            f"({stats['bytes_saved'] / stats['original_bytes']:.0%} smaller) in {stats['seconds'] * 1000:.0f} ms"
+        )
+
+    # Show raw text
+    st.subheader("📝 Raw Extracted Text:")
+    st.write(extracted_text)
+
+    # Clean and format sentences
+    st.info("🧹 Formatting text for natural speech...")
+    formatted_text = job.result("clean")
+
+    # st.subheader("✅ Final Cleaned Text:")
+    # st.write(formatted_text)
+
+    # Handle features with tier checks
+    summarize = handle_summarization(pipeline, formatted_text, key)
+    target_languages = handle_translation(pipeline, key)
+    job = start_job(pipeline, source, ["translate"])
+    if summarize:
+        st.write(job.result("summarize"))
+    if target_languages:
+        _, translations = job.result("translations")
+        for language in target_languages:
+            st.subheader(f"🌐 Translated Text ({LANGUAGE_NAMES[language]}):")
+            st.write(translations[language])
+        if len(target_languages) > 1:
+            st.caption(f"Speech and PDF use {LANGUAGE_NAMES[target_languages[0]]}, the first language selected.")
+        stats = translation_memory.stats()
+        st.caption(f"Translation memory: {stats['hit_ratio']:.0%} hit ratio, {stats['saved_chars']:,} billed characters saved")
+    handle_speech_conversion(pipeline, source, key)
+    handle_pdf_download(pipeline, source, key)
+    show_stage_timings(job.source.digest)
+
+def handle_summarization(pipeline, text, key):
+    """Handle summarization with tier check"""
+    enabled = False
+    if len(text) > 500:
+        if has_feature("Summarization"):
+            choice = st.radio("Summarize long text?", ["No", "Yes"], key=f"summarize_{key}")
+            enabled = choice == "Yes"
+        else:
+            st.warning("🔒 Summarization requires Basic tier or higher")
+    pipeline.set_params("summarize", enabled=enabled)
+    return enabled
+
+LANGUAGE_NAMES = {"es": "Spanish", "fr": "French", "de": "German", "zh": "Chinese"}
+
+def handle_translation(pipeline, key):
+    """Handle translation with tier check; returns the selected language codes in order"""
+    target_languages = []
+    if has_feature("Translation"):
+        target_languages = st.multiselect(
+            "Translate to:", list(LANGUAGE_NAMES), format_func=LANGUAGE_NAMES.get, key=f"translate_{key}"
+        )
+    else:
+        st.warning("🔒 Translation requires Pro tier")
+
+    # All languages are translated together; the first one is used for speech and PDF
+    pipeline.set_params("translations", target_languages=list(target_languages))
+    pipeline.set_params("translate", target_language=target_languages[0] if target_languages else None)
+    return target_languages
+
+def handle_speech_conversion(pipeline, source, key):
+    """Handle speech conversion with tier check"""
+    if has_feature("Speech Conversion"):
+        if st.button("🔊 Convert to Speech", key=f"speech_{key}"):
+            if pipeline.is_cached("synthesize", source):
+                audio = start_job(pipeline, source, ["synthesize"]).result("synthesize")
+            else:
+                # Synthesize here rather than in a job so the first chunk can play while the rest render
+                player = st.empty()
+
+                def play_first_chunk(index, count, audio):
+                    if index == 0 and count > 1:
+                        with player.container():
+                            st.caption(f"▶️ Part 1 of {count} — the full recording follows when ready")
+                            st.audio(audio, format="audio/mp3")
+
+                audio = pipeline.execute(
+                    "synthesize", source, [pipeline.run("translate", source)], on_chunk=play_first_chunk
+                )
+            # Sign the URL on every render; the memoized location outlives any one URL
+            st.audio(audio_location_url(audio), format="audio/mp3")
+    else:
+        st.warning("🔒 Speech conversion requires Pro tier")
+
+def handle_pdf_download(pipeline, source, key):
+    """Handle PDF download with tier check; the PDF is only rendered once asked for"""
+    if has_feature("PDF Download"):
+        if pipeline.is_cached("pdf", source) or st.button("📄 Prepare PDF", key=f"prepare_pdf_{key}"):
+            filename = f"{os.path.splitext(source.filename)[0]}.pdf"
+            st.download_button("📄 Download PDF", start_job(pipeline, source, ["pdf"]).result("pdf"),
+                               filename, key=f"pdf_{key}")
+    else:
+        st.warning("🔒 PDF download requires Basic tier")
+
+def show_stage_timings(digest):
+    """Show the per-stage latency breakdown of this run's pipeline jobs for a document"""
+    rows = {}
+    wall = 0.0
+    for job in st.session_state.active_jobs:
+        if job.source.digest != digest:
+            continue
+        job.wait()
+        wall += job.wall_seconds()
+        for timing in job.timings():
+            # Keep the first job's entry; later jobs see those stages as cached
+            rows.setdefault(timing["stage"], {
+                "Stage": timing["stage"],
+                "Status": timing["status"],
+                "Run (ms)": round(timing["seconds"] * 1000),
+                "Queued (ms)": round(timing["queued"] * 1000),
+            })
+    with st.expander("⏱ Stage timings"):
+        st.table(list(rows.values()))
+        busy = sum(row["Run (ms)"] for row in rows.values())
+        st.caption(f"Stage time {busy:,} ms in {wall * 1000:,.0f} ms wall clock")
+
+def show_metrics_panel():
+    """Show per-stage latency, error and payload metrics for this process in the sidebar"""
+    with st.sidebar.expander("📊 Stage metrics"):
+        rows = metrics.stage_summary()
+        if not rows:
+            st.caption("No calls recorded yet")
+            return
+        st.dataframe(
+            [{
+                "Stage": row["stage"],
+                "Tier": row["tier"],
+                "Calls": row["calls"],
+                "Errors": row["errors"],
+                "In flight": row["in_flight"],
+                "Mean (ms)": row["mean_ms"],
+                "p95 ≤ (ms)": row["p95_ms"],
+                "Mean in (B)": row["mean_bytes_in"],
+                "Mean out (B)": row["mean_bytes_out"],
+            } for row in rows],
+            hide_index=True
+        )
+        if metrics.METRICS_PORT:
+            st.caption(f"Prometheus: http://{metrics.METRICS_HOST}:{metrics.METRICS_PORT}/metrics")
+
+def show_aws_calls_panel():
+    """Show this session's AWS calls per operation in the sidebar, with a JSON-lines export"""
+    with st.sidebar.expander("☁️ AWS calls (this session)"):
+        operations = aws_tracing.summary(st.session_state.trace_id)
+        if not operations:
+            st.caption("No AWS calls yet")
+            return
+        st.dataframe(
+            [{
+                "Operation": f"{row['service']}.{row['operation']}",
+                "Requests": row["requests"],
+                "Retries": row["retries"],
+                "Throttled": row["throttles"],
+                "Errors": row["errors"],
+                "Sent (B)": row["bytes_out"],
+                "Received (B)": row["bytes_in"],
+                "Total (ms)": round(row["seconds"] * 1000),
+            } for row in operations],
+            hide_index=True
+        )
+        calls = io.StringIO()
+        aws_tracing.export_jsonl(calls, st.session_state.trace_id)
+        st.download_button("⬇️ Export JSON lines", calls.getvalue(), "aws_calls.jsonl", "application/x-ndjson")
+
+def main_app():
+    """Main application interface"""
+    st.title("✍ VisionVoice: Handwriting to Voice")
+    # Label this run's stage metrics with the user's tier and its AWS calls with the session
+    metrics.current_tier.set(st.session_state.subscription_tier)
+    aws_tracing.current_trace_id.set(st.session_state.trace_id)
+    
+    # Sidebar
+    st.sidebar.subheader("Account")
+    if st.session_state.user_info:
+        st.sidebar.write(f"👤 {st.session_state.user_info.get('name', 'User')}")
+        st.sidebar.write(f"📧 {st.session_state.user_info.get('email', 'N/A')}")
+        st.sidebar.write(f"💎 Tier: {st.session_state.subscription_tier.capitalize()}")
+        st.sidebar.write(f"📤 Uploads used: {st.session_state.upload_count}")
+    
+    if st.sidebar.button("🚪 Logout"):
+        logout()
+    
+    if st.sidebar.button("💰 Manage Subscription"):
+        st.session_state.manage_subscription = True
+
+    if METRICS_ADMIN_PANEL:
+        show_metrics_panel()
+        show_aws_calls_panel()
+    
+    # Subscription management view
+    if st.session_state.get("manage_subscription"):
+        display_pricing()
+        if st.button("← Back to App"):
+            st.session_state.manage_subscription = False
+            st.rerun()
+        return
+    
+    # Main functionality
+    uploaded_files = st.file_uploader(
+        "Upload handwritten images or scanned documents",
+        type=["jpg", "jpeg", "png", "pdf", "tif", "tiff"],
+        accept_multiple_files=True
+    )
+    # A rerun (new upload, widget change, navigation) supersedes earlier jobs
+    cancel_active_jobs()
+    if len(uploaded_files) == 1:
+        process_file(uploaded_files[0])
+    else:
+        for uploaded_file in uploaded_files:
+            with st.container(border=True):
+                st.subheader(f"📄 {uploaded_file.name}")
+                process_file(uploaded_file)
+
+def main():
+    """Main application flow"""
+    initialize_session_state()
+    handle_auth_callback()
+    
+    if st.session_state.authenticated:
+        if st.session_state.subscription_tier is None:
+            display_pricing()
+        else:
+            main_app()
+    else:
+        login_page()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
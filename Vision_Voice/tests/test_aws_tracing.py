@@ -0,0 +1,135 @@
+import io
+import json
+
+import boto3
+import botocore.endpoint
+import pytest
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+
+from chalicelib import aws_tracing
+
+
+class RawBody:
+    def __init__(self, data):
+        self.data = data
+
+    def stream(self, **kwargs):
+        yield self.data
+
+
+def textract_client(**config):
+    client = boto3.client("textract", region_name="us-east-1", config=Config(**config),
+                          aws_access_key_id="testing", aws_secret_access_key="testing")
+    return aws_tracing.attach(client)
+
+
+def replay(client, responses):
+    """Answer each HTTP attempt with the next (status, body) so botocore's retry logic still runs."""
+    def before_send(request, **kwargs):
+        status, body = responses.pop(0)
+        data = json.dumps(body).encode("utf-8")
+        headers = {"content-type": "application/x-amz-json-1.1", "content-length": str(len(data))}
+        return AWSResponse(request.url, status, headers, RawBody(data))
+
+    client.meta.events.register("before-send", before_send)
+
+
+@pytest.fixture(autouse=True)
+def clean_records(monkeypatch):
+    monkeypatch.setattr(botocore.endpoint.time, "sleep", lambda seconds: None)
+    aws_tracing.clear()
+    yield
+    aws_tracing.clear()
+
+
+def test_records_one_span_per_call_under_the_trace_id():
+    client = textract_client()
+    with Stubber(client) as stubber:
+        stubber.add_response("detect_document_text", {"Blocks": []})
+        stubber.add_response("detect_document_text", {"Blocks": []})
+        with aws_tracing.trace("session-1"):
+            client.detect_document_text(Document={"Bytes": b"image"})
+        client.detect_document_text(Document={"Bytes": b"image"})
+
+    [traced] = aws_tracing.records("session-1")
+    assert traced["service"] == "textract"
+    assert traced["operation"] == "DetectDocumentText"
+    assert traced["status"] == 200
+    assert traced["error"] is None
+    assert (traced["retries"], traced["throttles"]) == (0, 0)
+    assert traced["seconds"] >= 0
+    assert [record["trace_id"] for record in aws_tracing.records()] == ["session-1", None]
+
+
+def test_counts_retries_and_throttles_of_a_call_that_eventually_succeeds():
+    client = textract_client(retries={"mode": "standard", "total_max_attempts": 5})
+    throttled = {"__type": "ThrottlingException", "message": "Rate exceeded"}
+    replay(client, [(400, throttled), (400, throttled), (200, {"Blocks": []})])
+
+    with aws_tracing.trace("job-1"):
+        client.detect_document_text(Document={"Bytes": b"image"})
+
+    [traced] = aws_tracing.records("job-1")
+    assert traced["status"] == 200
+    assert traced["retries"] == 2
+    assert traced["throttles"] == 2
+    assert traced["bytes_in"] == len(json.dumps({"Blocks": []}))
+
+
+def test_records_the_error_code_when_retries_run_out():
+    client = textract_client(retries={"mode": "standard", "total_max_attempts": 2})
+    throttled = {"__type": "ThrottlingException", "message": "Rate exceeded"}
+    replay(client, [(400, throttled), (400, throttled)])
+
+    with aws_tracing.trace("job-2"), pytest.raises(ClientError):
+        client.detect_document_text(Document={"Bytes": b"image"})
+
+    [traced] = aws_tracing.records("job-2")
+    assert traced["status"] == 400
+    assert traced["error"] == "ThrottlingException"
+    assert (traced["retries"], traced["throttles"]) == (1, 2)
+
+
+def test_stubbed_throttle_counts_once():
+    client = textract_client()
+    with Stubber(client) as stubber:
+        stubber.add_client_error("detect_document_text", "ThrottlingException", http_status_code=400)
+        with aws_tracing.trace("job-3"), pytest.raises(ClientError):
+            client.detect_document_text(Document={"Bytes": b"image"})
+
+    [traced] = aws_tracing.records("job-3")
+    assert (traced["error"], traced["retries"], traced["throttles"]) == ("ThrottlingException", 0, 1)
+
+
+def test_attach_is_idempotent():
+    client = aws_tracing.attach(textract_client())
+    with Stubber(client) as stubber:
+        stubber.add_response("detect_document_text", {"Blocks": []})
+        client.detect_document_text(Document={"Bytes": b"image"})
+
+    assert len(aws_tracing.records()) == 1
+
+
+def test_summary_and_jsonl_export_per_operation():
+    client = textract_client()
+    with Stubber(client) as stubber:
+        stubber.add_response("detect_document_text", {"Blocks": []})
+        stubber.add_response("detect_document_text", {"Blocks": []})
+        stubber.add_client_error("analyze_document", "InvalidParameterException", http_status_code=400)
+        with aws_tracing.trace("job-4"):
+            client.detect_document_text(Document={"Bytes": b"a"})
+            client.detect_document_text(Document={"Bytes": b"b"})
+            with pytest.raises(ClientError):
+                client.analyze_document(Document={"Bytes": b"c"}, FeatureTypes=["TABLES"])
+
+    totals = {row["operation"]: row for row in aws_tracing.summary("job-4")}
+    assert (totals["DetectDocumentText"]["requests"], totals["DetectDocumentText"]["errors"]) == (2, 0)
+    assert (totals["AnalyzeDocument"]["requests"], totals["AnalyzeDocument"]["errors"]) == (1, 1)
+
+    output = io.StringIO()
+    assert aws_tracing.export_jsonl(output, "job-4") == 3
+    exported = [json.loads(row) for row in output.getvalue().splitlines()]
+    assert aws_tracing.summarize_calls(exported) == aws_tracing.summary("job-4")
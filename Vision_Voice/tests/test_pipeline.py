@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from chalicelib.orchestrator import run_pipeline
+from chalicelib.pipeline import SourceDocument, StageGraph, StageMemo
+
+
+class PausingMemo(StageMemo):
+    """StageMemo whose first lookup stalls until released, as a slow thread would."""
+
+    def __init__(self):
+        super().__init__()
+        self.looked_up = threading.Event()
+        self.release = threading.Event()
+
+    def _pause(self):
+        if not self.looked_up.is_set():
+            self.looked_up.set()
+            self.release.wait(timeout=0.2)
+
+    def __contains__(self, key):
+        found = super().__contains__(key)
+        self._pause()
+        return found
+
+    def get(self, key):
+        result = super().get(key)
+        self._pause()
+        return result
+
+
+def test_stage_finished_by_another_job_is_not_reported_as_computed():
+    calls = []
+    graph = StageGraph(memo=PausingMemo())
+    graph.add_stage("upper", lambda source: calls.append(source) or source.data.upper())
+    source = SourceDocument(b"text", "notes.txt")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        late = run_pipeline(graph, source, ["upper"], executor)
+        graph.memo.looked_up.wait()
+        early = run_pipeline(graph, source, ["upper"], executor)
+        early.wait()
+        graph.memo.release.set()
+        late.wait()
+
+    assert early.result("upper") == late.result("upper") == b"TEXT"
+    assert [early.computed("upper"), late.computed("upper")].count(True) == len(calls) == 1
+
+
+def test_stage_memo_evicts_the_least_recently_used_entry():
+    memo = StageMemo(max_entries=2)
+    memo.put("a", 1)
+    memo.put("b", 2)
+    assert memo.get("a") == (True, 1)
+
+    memo.put("c", 3)
+
+    assert "b" not in memo
+    assert memo.get("a") == (True, 1)
+    assert memo.get("c") == (True, 3)
+    assert memo.get("b") == (False, None)
@@ -0,0 +1,105 @@
+import re
+import types
+
+import pytest
+
+from chalicelib import pipeline, polly_utils
+from chalicelib.cache_store import DiskCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(polly_utils, "time", types.SimpleNamespace(time=lambda: now[0]))
+    monkeypatch.setattr(polly_utils, "_presigned_urls", {})
+    signed = []
+
+    def generate_presigned_url(key, expiration):
+        signed.append(key)
+        return f"https://example.test/{key}?signed={len(signed)}"
+
+    monkeypatch.setattr(polly_utils, "generate_presigned_url", generate_presigned_url)
+    return now
+
+
+def test_memo_hit_past_expiry_gets_a_new_url(monkeypatch, clock):
+    synthesized = []
+
+    def synthesize_audio(text, **kwargs):
+        synthesized.append(text)
+        return {"s3_key": "audio/abc.mp3"}
+
+    monkeypatch.setattr(polly_utils, "synthesize_audio", synthesize_audio)
+    graph = pipeline.build_document_pipeline()
+    source = pipeline.SourceDocument(b"image", "page.jpg")
+
+    first = polly_utils.audio_location_url(graph.execute("synthesize", source, ["Hello."]))
+    assert polly_utils.audio_location_url(graph.execute("synthesize", source, ["Hello."])) == first
+
+    clock[0] += polly_utils.PRESIGNED_URL_EXPIRATION + 1
+    location = graph.execute("synthesize", source, ["Hello."])
+    refreshed = polly_utils.audio_location_url(location)
+
+    assert synthesized == ["Hello."]
+    assert location == {"s3_key": "audio/abc.mp3"}
+    assert refreshed != first
+    assert refreshed.endswith("signed=2")
+
+
+def test_url_is_refreshed_inside_the_margin(clock):
+    location = {"s3_key": "audio/abc.mp3"}
+    first = polly_utils.audio_location_url(location)
+
+    clock[0] += polly_utils.PRESIGNED_URL_EXPIRATION - polly_utils.PRESIGNED_URL_REFRESH_MARGIN - 1
+    assert polly_utils.audio_location_url(location) == first
+    clock[0] += 2
+    assert polly_utils.audio_location_url(location) != first
+
+
+def test_audio_cache_hit_returns_the_stored_location(monkeypatch, tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "audio_cache.db"))
+    monkeypatch.setattr(polly_utils, "get_audio_cache", lambda: cache)
+    monkeypatch.setattr(polly_utils, "AUDIO_CACHE_STORAGE", "s3")
+    ssml = polly_utils.format_text_for_ssml("Hello.")
+    cache.set(polly_utils.audio_cache_key(ssml, "Joanna", "mp3"), {"s3_key": "audio/cached.mp3"})
+
+    assert polly_utils.synthesize_audio("Hello.") == {"s3_key": "audio/cached.mp3"}
+
+
+def test_local_and_unarchived_locations_pass_through():
+    assert polly_utils.audio_location_url({"path": "/tmp/a.mp3"}) == "/tmp/a.mp3"
+    assert polly_utils.audio_location_url(b"ID3") == b"ID3"
+
+
+def test_split_ssml_keeps_each_document_within_polly_limits():
+    text = "\n".join(
+        [f"Sentence number {i} has a few words & symbols." for i in range(60)] + ["- a bullet point"] * 10
+    )
+    ssml = polly_utils.format_text_for_ssml(text)
+
+    chunks = polly_utils.split_ssml(ssml, max_billed=300, max_chars=600)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.startswith("<speak>\n") and chunk.endswith("\n</speak>")
+        assert polly_utils._billed_length(chunk) <= 300
+        assert len(chunk) <= 600
+    # Every sentence survives whole, in order
+    elements = [line for chunk in chunks for line in chunk.splitlines()[1:-1]]
+    assert elements == ssml.splitlines()[1:-1]
+
+
+def test_split_ssml_splits_an_oversized_sentence_at_word_boundaries():
+    ssml = polly_utils.format_text_for_ssml(" ".join(["word"] * 200))
+
+    chunks = polly_utils.split_ssml(ssml, max_billed=100)
+
+    assert all(polly_utils._billed_length(chunk) <= 100 for chunk in chunks)
+    assert len(chunks) > 1
+    assert " ".join(re.sub(r"<[^>]+>", " ", "".join(chunks)).split()) == " ".join(["word"] * 200)
+
+
+def test_split_ssml_returns_short_input_as_one_document():
+    ssml = polly_utils.format_text_for_ssml("Hello there. How are you?")
+
+    assert polly_utils.split_ssml(ssml) == [ssml]
@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chalicelib.quota_store import QuotaTracker, SQLiteQuotaBackend, current_window
+
+WINDOW = "2025-04"
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SQLiteQuotaBackend(str(tmp_path / "quota.db"))
+
+
+def consume_concurrently(trackers, limit, attempts):
+    """Call try_consume from many threads at once; returns the allowed flags."""
+    start = threading.Barrier(attempts)
+
+    def attempt(index):
+        start.wait()
+        return trackers[index % len(trackers)].try_consume("alice", limit, window=WINDOW)[0]
+
+    with ThreadPoolExecutor(max_workers=attempts) as pool:
+        return list(pool.map(attempt, range(attempts)))
+
+
+def test_strict_mode_enforces_the_limit(backend):
+    tracker = QuotaTracker(backend)
+
+    assert [tracker.try_consume("alice", 2, window=WINDOW) for _ in range(3)] == [(True, 1), (True, 2), (False, 2)]
+    assert tracker.try_consume("bob", 2, window=WINDOW) == (True, 1)
+    assert tracker.try_consume("alice", float("inf"), window=WINDOW) == (True, 3)
+
+
+def test_strict_mode_holds_across_trackers_sharing_a_backend(backend):
+    trackers = [QuotaTracker(backend), QuotaTracker(backend)]
+
+    allowed = consume_concurrently(trackers, limit=5, attempts=16)
+
+    assert allowed.count(True) == 5
+    assert backend.get_usage("alice", WINDOW) == 5
+
+
+def test_write_behind_concurrent_consumers_cannot_overrun(backend, monkeypatch):
+    tracker = QuotaTracker(backend, write_behind=True, flush_interval=3600, max_pending=1000)
+    assert tracker.usage("alice", WINDOW) == 0
+    cached_usage = tracker._usage.get
+    # Widen the gap between reading usage and recording the increment, where unlocked check-then-add raced
+    monkeypatch.setattr(tracker._usage, "get", lambda *args: (cached_usage(*args), time.sleep(0.01))[0])
+
+    allowed = consume_concurrently([tracker], limit=5, attempts=16)
+
+    assert allowed.count(True) == 5
+    assert tracker.usage("alice", WINDOW) == 5
+    assert backend.get_usage("alice", WINDOW) == 0
+    tracker.flush()
+    assert backend.get_usage("alice", WINDOW) == 5
+
+
+def test_write_behind_flushes_once_enough_increments_are_pending(backend):
+    tracker = QuotaTracker(backend, write_behind=True, flush_interval=3600, max_pending=2)
+
+    tracker.try_consume("alice", 10, window=WINDOW)
+    assert backend.get_usage("alice", WINDOW) == 0
+    tracker.try_consume("bob", 10, window=WINDOW)
+
+    assert backend.get_usage("alice", WINDOW) == 1
+    assert backend.get_usage("bob", WINDOW) == 1
+
+
+def test_failed_flush_requeues_the_increments(backend, monkeypatch):
+    tracker = QuotaTracker(backend, write_behind=True, flush_interval=3600)
+    tracker.try_consume("alice", 10, window=WINDOW)
+
+    def unavailable(increments):
+        raise ConnectionError("backend down")
+
+    monkeypatch.setattr(backend, "add_usage", unavailable)
+    tracker.flush()
+    monkeypatch.undo()
+    tracker.flush()
+
+    assert backend.get_usage("alice", WINDOW) == 1
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_refund_returns_reserved_usage(backend, write_behind):
+    tracker = QuotaTracker(backend, write_behind=write_behind, flush_interval=3600)
+    tracker.try_consume("alice", 2, window=WINDOW)
+    tracker.try_consume("alice", 2, window=WINDOW)
+    assert tracker.try_consume("alice", 2, window=WINDOW)[0] is False
+
+    assert tracker.refund("alice", window=WINDOW) == 1
+    assert tracker.try_consume("alice", 2, window=WINDOW) == (True, 2)
+    tracker.flush()
+    assert backend.get_usage("alice", WINDOW) == 2
+
+
+def test_usage_reads_the_backend_once_per_ttl(backend, monkeypatch):
+    backend.add_usage({("alice", WINDOW): 3})
+    tracker = QuotaTracker(backend, usage_ttl=60)
+    reads = []
+    get_usage = backend.get_usage
+    monkeypatch.setattr(backend, "get_usage", lambda *key: reads.append(key) or get_usage(*key))
+
+    assert [tracker.usage("alice", WINDOW) for _ in range(3)] == [3, 3, 3]
+    assert reads == [("alice", WINDOW)]
+
+
+def test_reset_clears_usage_and_pending(backend):
+    tracker = QuotaTracker(backend, write_behind=True, flush_interval=3600)
+    tracker.try_consume("alice", 5, window=WINDOW)
+
+    tracker.reset("alice", WINDOW)
+    tracker.flush()
+
+    assert tracker.usage("alice", WINDOW) == 0
+    assert backend.get_usage("alice", WINDOW) == 0
+
+
+def test_window_defaults_to_the_current_month(backend):
+    tracker = QuotaTracker(backend)
+    tracker.try_consume("alice", 5)
+
+    assert backend.get_usage("alice", current_window()) == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from chalicelib.text_processing import byte_size, split_text_by_bytes
+from chalicelib.translate_utils import PARAGRAPH_SEPARATOR, pack_paragraphs
+
+
+@pytest.mark.parametrize("text", [
+    "One sentence. Another one! A third? " * 40,
+    "Crème brûlée für alle. Über Größe reden wir später. " * 30,
+    "漢字の文です。これも文です！" * 50,
+    "unbroken" * 200,
+])
+def test_split_text_by_bytes_keeps_chunks_within_the_limit(text):
+    chunks = split_text_by_bytes(text, 100)
+
+    assert len(chunks) > 1
+    assert all(byte_size(chunk) <= 100 for chunk in chunks)
+    assert ''.join(chunks) == text
+
+
+def test_split_text_by_bytes_prefers_sentence_boundaries():
+    text = "First sentence here. Second sentence here. Third sentence here."
+
+    assert split_text_by_bytes(text, 45) == ["First sentence here. Second sentence here.", " Third sentence here."]
+    assert split_text_by_bytes(text, 1000) == [text]
+
+
+def test_split_text_by_bytes_never_splits_a_multibyte_character():
+    chunks = split_text_by_bytes("é" * 11, 4)
+
+    assert chunks == ["éé"] * 5 + ["é"]
+
+
+def test_pack_paragraphs_fills_each_batch_up_to_the_limit():
+    paragraphs = ["a" * 40, "b" * 40, "c" * 40, "d" * 10]
+
+    batches = pack_paragraphs(paragraphs, max_bytes=100)
+
+    assert batches == [["a" * 40, "b" * 40], ["c" * 40, "d" * 10]]
+    assert all(byte_size(PARAGRAPH_SEPARATOR.join(batch)) <= 100 for batch in batches)
+
+
+def test_pack_paragraphs_counts_bytes_not_characters():
+    paragraphs = ["ü" * 30, "ü" * 30]
+
+    assert pack_paragraphs(paragraphs, max_bytes=100) == [["ü" * 30], ["ü" * 30]]
+    assert pack_paragraphs(paragraphs, max_bytes=122) == [paragraphs]
+
+
+def test_pack_paragraphs_gives_an_oversized_paragraph_its_own_batch():
+    assert pack_paragraphs(["short", "x" * 500, "tail"], max_bytes=100) == [["short"], ["x" * 500], ["tail"]]
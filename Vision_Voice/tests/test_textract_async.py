@@ -0,0 +1,101 @@
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from chalicelib import textract_utils
+
+KEY = "uploads/report.pdf"
+LOCATION = {"S3Object": {"Bucket": textract_utils.BUCKET_NAME, "Name": KEY}}
+
+
+def line(block_id, text, page, top):
+    return {
+        "BlockType": "LINE", "Id": block_id, "Text": text, "Page": page,
+        "Geometry": {"BoundingBox": {"Left": 0.1, "Top": top, "Width": 0.3, "Height": 0.02}},
+    }
+
+
+@pytest.fixture
+def textract():
+    client = boto3.client("textract", region_name="us-east-1",
+                          aws_access_key_id="testing", aws_secret_access_key="testing")
+    with Stubber(client) as stubber:
+        yield client, stubber
+        stubber.assert_no_pending_responses()
+
+
+def test_polls_until_done_and_follows_next_token(textract):
+    client, stubber = textract
+    stubber.add_response("start_document_text_detection", {"JobId": "job-1"}, {"DocumentLocation": LOCATION})
+    stubber.add_response("get_document_text_detection", {"JobStatus": "IN_PROGRESS"},
+                         {"JobId": "job-1", "MaxResults": 1000})
+    stubber.add_response("get_document_text_detection", {"JobStatus": "IN_PROGRESS"},
+                         {"JobId": "job-1", "MaxResults": 1000})
+    stubber.add_response("get_document_text_detection", {
+        "JobStatus": "SUCCEEDED",
+        "DocumentMetadata": {"Pages": 2},
+        "Blocks": [line("a", "First page", 1, 0.1), line("b", "Second page starts", 2, 0.1)],
+        "NextToken": "token-2",
+    }, {"JobId": "job-1", "MaxResults": 1000})
+    stubber.add_response("get_document_text_detection", {
+        "JobStatus": "SUCCEEDED",
+        "Blocks": [line("c", "Second page ends", 2, 0.125)],
+    }, {"JobId": "job-1", "MaxResults": 1000, "NextToken": "token-2"})
+    sleeps = []
+
+    text = textract_utils.extract_text_from_document(
+        KEY, client=client, poll_interval=0.5, max_poll_interval=0.75, sleep=sleeps.append
+    )
+
+    assert text == "First page\n\nSecond page starts\nSecond page ends"
+    assert sleeps == [0.5, 0.75]
+
+
+def test_analysis_profile_starts_document_analysis(textract):
+    client, stubber = textract
+    stubber.add_response("start_document_analysis", {"JobId": "job-2"},
+                         {"DocumentLocation": LOCATION, "FeatureTypes": ["TABLES"]})
+    stubber.add_response("get_document_analysis", {
+        "JobStatus": "SUCCEEDED", "DocumentMetadata": {"Pages": 1}, "Blocks": [line("a", "Totals", 1, 0.1)],
+    }, {"JobId": "job-2", "MaxResults": 1000})
+
+    text = textract_utils.extract_text_from_document(KEY, profile="tables", client=client, sleep=lambda s: None)
+
+    assert text == "Totals"
+
+
+def test_wait_for_completion_is_called_with_the_job_id(textract):
+    client, stubber = textract
+    stubber.add_response("start_document_text_detection", {"JobId": "job-3"}, {"DocumentLocation": LOCATION})
+    stubber.add_response("get_document_text_detection", {
+        "JobStatus": "SUCCEEDED", "DocumentMetadata": {"Pages": 1}, "Blocks": [line("a", "Done", 1, 0.1)],
+    }, {"JobId": "job-3", "MaxResults": 1000})
+    waited = []
+
+    textract_utils.extract_text_from_document(KEY, client=client, wait_for_completion=waited.append,
+                                              sleep=lambda s: None)
+
+    assert waited == ["job-3"]
+
+
+def test_failed_job_raises(textract):
+    client, stubber = textract
+    stubber.add_response("start_document_text_detection", {"JobId": "job-4"}, {"DocumentLocation": LOCATION})
+    stubber.add_response("get_document_text_detection", {"JobStatus": "FAILED", "StatusMessage": "Unsupported"},
+                         {"JobId": "job-4", "MaxResults": 1000})
+
+    with pytest.raises(RuntimeError) as error:
+        textract_utils.extract_text_from_document(KEY, client=client, sleep=lambda s: None)
+    assert "Unsupported" in str(error.value.__cause__)
+
+
+def test_times_out_while_in_progress(textract):
+    client, stubber = textract
+    stubber.add_response("start_document_text_detection", {"JobId": "job-5"}, {"DocumentLocation": LOCATION})
+    stubber.add_response("get_document_text_detection", {"JobStatus": "IN_PROGRESS"},
+                         {"JobId": "job-5", "MaxResults": 1000})
+
+    with pytest.raises(RuntimeError) as error:
+        textract_utils.extract_text_from_document(KEY, client=client, poll_interval=5, timeout=1,
+                                                  sleep=lambda s: None)
+    assert isinstance(error.value.__cause__, TimeoutError)